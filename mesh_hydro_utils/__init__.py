@@ -1,5 +1,28 @@
 from .__version__ import __version__
-from .mesh_hydro_io import write_ic, read_output, read_ic, check_file_exists
+from .mesh_hydro_io import (
+    write_ic,
+    read_output,
+    read_outputs,
+    prefetch_outputs,
+    read_output_header,
+    read_output_headers,
+    output_is_complete,
+    read_output_blocks,
+    output_sum,
+    output_minmax,
+    output_histogram,
+    read_ic,
+    write_hdf5,
+    convert_outputs_to_hdf5,
+    read_hdf5_run,
+    read_hdf5_run_header,
+    check_file_exists,
+    Snapshot,
+    SnapshotSeries,
+    enable_output_cache,
+    disable_output_cache,
+    clear_output_cache,
+)
 
 from .mesh_hydro_plotting import (
     plot_1D,
@@ -11,9 +34,20 @@ from .mesh_hydro_plotting import (
     plot_savefig,
     plot_get_figname,
 )
-from .mesh_hydro_riemann import riemann_solver
+from .mesh_hydro_riemann import (
+    RiemannSolver,
+    riemann_solver,
+    find_star_states,
+    sample_riemann_problems,
+    two_rarefaction_star_states,
+)
+from .mesh_hydro_godunov import godunov_fluxes, interface_fluxes
 from .mesh_hydro_utilities import (
     label_to_kwargs,
     get_all_files_with_same_basename,
+    get_output_index,
+    split_output_name,
+    OutputIndex,
     get_only_cmdlinearg,
 )
+from .mesh_hydro_watch import OutputWatcher
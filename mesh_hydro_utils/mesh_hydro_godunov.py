@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+
+# ------------------------------------------------------------------------------------------------
+# Godunov fluxes through the cell interfaces of hydro outputs, using the
+# exact Riemann solver or one of the approximate HLL, HLLC, Roe, and
+# two-rarefaction (TRRS) solvers.
+#
+# For documentation on what is being computed, please refer to the documentation
+# provided in the mesh-hydro code (https://github.com/mladenivkovic/mesh-hydro)
+# ------------------------------------------------------------------------------------------------
+
+
+import numpy as np
+
+from . import mesh_hydro_riemann as riemann
+
+
+def godunov_fluxes(
+    ndim, rho, u, p, boundary="periodic", solver="exact", gamma=riemann.gamma
+):
+    """
+    Compute the Godunov fluxes through all cell interfaces of a snapshot,
+    e.g. as returned by read_output. The Riemann problems of all interfaces
+    are solved at once.
+
+    ndim:       number of dimensions
+    rho:        numpy array for density
+    u:          numpy array for velocity. In 2D: contains both ux and uy,
+                with shape rho.shape + (2,)
+    p:          numpy array for pressure
+    boundary:   "periodic" or "transmissive"
+    solver:     name of the Riemann solver to use, see interface_fluxes
+    gamma:      adiabatic index
+
+    For 2D arrays, the first index is along the y axis and the second one
+    along the x axis, as returned by read_output.
+
+    returns:
+        list containing a tuple (mass, momentum, energy) of flux arrays for
+        every dimension, i.e. [(mass, momentum, energy)] in 1D, and
+        [(mass_x, momentum_x, energy_x), (mass_y, momentum_y, energy_y)] in
+        2D. Along the direction of the fluxes, the arrays contain one
+        element more than there are cells: element k is the flux through
+        the lower interface of cell k, so that the fluxes of cell k are
+        given by elements k and k + 1. In 2D, the momentum fluxes have an
+        additional last axis for the x and y components.
+    """
+
+    if ndim == 1:
+        rhoL, rhoR = _interface_states(rho, 0, boundary)
+        uL, uR = _interface_states(u, 0, boundary)
+        pL, pR = _interface_states(p, 0, boundary)
+        return [
+            interface_fluxes(rhoL, uL, pL, rhoR, uR, pR, solver=solver, gamma=gamma)
+        ]
+
+    elif ndim == 2:
+        fluxes = []
+        # x faces are along the second axis, y faces along the first one
+        for axis, normal in ((1, 0), (0, 1)):
+            rhoL, rhoR = _interface_states(rho, axis, boundary)
+            uL, uR = _interface_states(u, axis, boundary)
+            pL, pR = _interface_states(p, axis, boundary)
+            tangential = 1 - normal
+
+            mass, mom_n, mom_t, energy = interface_fluxes(
+                rhoL,
+                uL[..., normal],
+                pL,
+                rhoR,
+                uR[..., normal],
+                pR,
+                utL=uL[..., tangential],
+                utR=uR[..., tangential],
+                solver=solver,
+                gamma=gamma,
+            )
+
+            momentum = np.empty(mass.shape + (2,), dtype=float)
+            momentum[..., normal] = mom_n
+            momentum[..., tangential] = mom_t
+            fluxes.append((mass, momentum, energy))
+
+        return fluxes
+
+    else:
+        raise ValueError("Unknown ndim '{0}'".format(ndim))
+
+
+def interface_fluxes(
+    rhoL, uL, pL, rhoR, uR, pR, utL=None, utR=None, solver="exact", gamma=riemann.gamma
+):
+    """
+    Compute the Godunov fluxes through interfaces with the given left and
+    right states. All arguments may be numpy arrays of equal shape.
+
+    rhoL, uL, pL:   density, normal velocity, pressure left of the interfaces
+    rhoR, uR, pR:   density, normal velocity, pressure right of the interfaces
+    utL, utR:       tangential velocities left and right of the interfaces.
+                    They are advected with the contact discontinuity.
+    solver:         name of the Riemann solver to use:
+                    "exact":    the iterative exact solver
+                    "trrs":     the two-rarefaction solver, sampled like
+                                the exact one
+                    "hll":      the HLL solver
+                    "hllc":     the HLLC solver
+                    "roe":      the Roe solver with the Harten-Hyman
+                                entropy fix
+                    The HLL, HLLC, and Roe solvers need states with
+                    non-zero density on both sides.
+    gamma:          adiabatic index
+
+    returns:
+        mass, momentum, energy:     numpy arrays of the fluxes, if utL and
+                                    utR are None
+        mass, momentum_normal, momentum_tangential, energy:
+                                    numpy arrays of the fluxes otherwise
+    """
+
+    rs = riemann.RiemannSolver(gamma)
+
+    if solver in ("exact", "trrs"):
+        rho, u, p, ustar = rs.sample_riemann_problems(
+            rhoL, uL, pL, rhoR, uR, pR, solver=solver
+        )
+
+        mass = rho * u
+        momentum = mass * u + p
+        energy = p / rs.GM1 + 0.5 * mass * u
+
+        if utL is None or utR is None:
+            energy = (energy + p) * u
+            return mass, momentum, energy
+
+        # the interface lies left of the contact where ustar > 0
+        ut = np.where(ustar > 0, utL, utR)
+        momentum_t = mass * ut
+        energy += 0.5 * rho * ut**2
+        energy = (energy + p) * u
+
+        return mass, momentum, momentum_t, energy
+
+    if solver == "hll":
+        flux = _hll_fluxes
+    elif solver == "hllc":
+        flux = _hllc_fluxes
+    elif solver == "roe":
+        flux = _roe_fluxes
+    else:
+        raise ValueError("Unknown solver '{0}'".format(solver))
+
+    tangential = utL is not None and utR is not None
+    if not tangential:
+        utL = 0.0
+        utR = 0.0
+
+    rhoL, uL, pL, utL, rhoR, uR, pR, utR = riemann._broadcast_states(
+        rhoL, uL, pL, utL, rhoR, uR, pR, utR
+    )
+    left = _conserved_state(rs, rhoL, uL, pL, utL)
+    right = _conserved_state(rs, rhoR, uR, pR, utR)
+
+    mass, momentum, momentum_t, energy = flux(rs, left, right)
+
+    if not tangential:
+        return mass, momentum, energy
+
+    return mass, momentum, momentum_t, energy
+
+
+def _conserved_state(rs, rho, u, p, ut):
+    """
+    Collect everything the approximate solvers need to know about the
+    states on one side of the interfaces.
+
+    rs:             RiemannSolver with the adiabatic index
+    rho, u, p, ut:  density, normal velocity, pressure, tangential velocity
+
+    returns:
+        dict with the primitive states, the sound speed "a", the conserved
+        states "U" and their fluxes "F". U and F are lists of the mass,
+        normal momentum, tangential momentum, and energy components.
+    """
+
+    E = p / rs.GM1 + 0.5 * rho * (u**2 + ut**2)
+    U = [rho, rho * u, rho * ut, E]
+    F = [rho * u, rho * u**2 + p, rho * u * ut, (E + p) * u]
+    a = rs._soundspeed(p, rho)
+
+    return {"rho": rho, "u": u, "p": p, "ut": ut, "a": a, "U": U, "F": F}
+
+
+def _wave_speeds(rs, left, right):
+    """
+    Estimate the speeds of the fastest left and right going waves from the
+    pressure based estimate of the star state pressure.
+    (See Toro 1999, section 10.5.2)
+
+    returns:
+        SL, SR:     numpy arrays of the wave speeds
+    """
+
+    rhoL, uL, pL, aL = left["rho"], left["u"], left["p"], left["a"]
+    rhoR, uR, pR, aR = right["rho"], right["u"], right["p"], right["a"]
+
+    ppv = 0.5 * (pL + pR) - 0.125 * (uR - uL) * (rhoL + rhoR) * (aL + aR)
+    pstar = np.maximum(0.0, ppv)
+
+    fact = 0.5 * rs.GP1 / rs.gamma
+    qL = np.where(pstar > pL, np.sqrt(1 + fact * (pstar / pL - 1)), 1.0)
+    qR = np.where(pstar > pR, np.sqrt(1 + fact * (pstar / pR - 1)), 1.0)
+
+    SL = uL - aL * qL
+    SR = uR + aR * qR
+
+    return SL, SR
+
+
+def _hll_fluxes(rs, left, right):
+    """
+    Compute the HLL fluxes between the left and right states.
+    (See Toro 1999, section 10.3)
+
+    returns:
+        list of the mass, normal momentum, tangential momentum, and energy
+        flux arrays
+    """
+
+    SL, SR = _wave_speeds(rs, left, right)
+
+    fluxes = []
+    for UL, UR, FL, FR in zip(left["U"], right["U"], left["F"], right["F"]):
+        Fhll = (SR * FL - SL * FR + SL * SR * (UR - UL)) / (SR - SL)
+        fluxes.append(np.where(SL >= 0, FL, np.where(SR <= 0, FR, Fhll)))
+
+    return fluxes
+
+
+def _hllc_fluxes(rs, left, right):
+    """
+    Compute the HLLC fluxes between the left and right states.
+    (See Toro 1999, section 10.4)
+
+    returns:
+        list of the mass, normal momentum, tangential momentum, and energy
+        flux arrays
+    """
+
+    SL, SR = _wave_speeds(rs, left, right)
+
+    rhoL, uL, pL = left["rho"], left["u"], left["p"]
+    rhoR, uR, pR = right["rho"], right["u"], right["p"]
+    mL = rhoL * (SL - uL)
+    mR = rhoR * (SR - uR)
+    Sstar = (pR - pL + uL * mL - uR * mR) / (mL - mR)
+
+    # fluxes in the left and right star regions
+    Fstar = []
+    for K, SK, mK in ((left, SL, mL), (right, SR, mR)):
+        fact = mK / (SK - Sstar)
+        EK = K["U"][3]
+        Ustar = [
+            fact,
+            fact * Sstar,
+            fact * K["ut"],
+            fact * (EK / K["rho"] + (Sstar - K["u"]) * (Sstar + K["p"] / mK)),
+        ]
+        Fstar.append([F + SK * (Us - U) for F, Us, U in zip(K["F"], Ustar, K["U"])])
+
+    fluxes = []
+    for FL, FstarL, FstarR, FR in zip(left["F"], Fstar[0], Fstar[1], right["F"]):
+        fluxes.append(
+            np.where(
+                SL >= 0,
+                FL,
+                np.where(Sstar >= 0, FstarL, np.where(SR > 0, FstarR, FR)),
+            )
+        )
+
+    return fluxes
+
+
+def _roe_fluxes(rs, left, right):
+    """
+    Compute the Roe fluxes between the left and right states, using the
+    Harten-Hyman entropy fix for the non-linear waves.
+    (See Toro 1999, sections 11.2 and 11.4)
+
+    returns:
+        list of the mass, normal momentum, tangential momentum, and energy
+        flux arrays
+    """
+
+    GM1 = rs.GM1
+
+    # Roe averages
+    wL = np.sqrt(left["rho"])
+    wR = np.sqrt(right["rho"])
+    norm = 1.0 / (wL + wR)
+    HL = (left["U"][3] + left["p"]) / left["rho"]
+    HR = (right["U"][3] + right["p"]) / right["rho"]
+    u = (wL * left["u"] + wR * right["u"]) * norm
+    ut = (wL * left["ut"] + wR * right["ut"]) * norm
+    H = (wL * HL + wR * HR) * norm
+    vsq = u**2 + ut**2
+    a = np.sqrt(GM1 * (H - 0.5 * vsq))
+
+    # wave strengths
+    d = [UR - UL for UL, UR in zip(left["U"], right["U"])]
+    alpha_t = d[2] - ut * d[0]
+    dE = d[3] - alpha_t * ut
+    alpha_2 = GM1 / a**2 * (d[0] * (H - u**2) + u * d[1] - dE)
+    alpha_1 = 0.5 / a * (d[0] * (u + a) - d[1] - a * alpha_2)
+    alpha_5 = d[0] - (alpha_1 + alpha_2)
+
+    # eigenvalues, with the entropy fix for the non-linear ones
+    lambda_1 = _harten_hyman(u - a, left["u"] - left["a"], right["u"] - right["a"])
+    lambda_2 = np.abs(u)
+    lambda_5 = _harten_hyman(u + a, left["u"] + left["a"], right["u"] + right["a"])
+
+    # right eigenvectors times wave strengths times eigenvalues
+    w1 = lambda_1 * alpha_1
+    w2 = lambda_2 * alpha_2
+    wt = lambda_2 * alpha_t
+    w5 = lambda_5 * alpha_5
+    dissipation = [
+        w1 + w2 + w5,
+        w1 * (u - a) + w2 * u + w5 * (u + a),
+        (w1 + w2 + w5) * ut + wt,
+        w1 * (H - u * a) + w2 * 0.5 * vsq + wt * ut + w5 * (H + u * a),
+    ]
+
+    return [
+        0.5 * (FL + FR - D) for FL, FR, D in zip(left["F"], right["F"], dissipation)
+    ]
+
+
+def _harten_hyman(lam, lamL, lamR):
+    """
+    Get the absolute value of the eigenvalue lam of the Roe matrix, smoothed
+    with the Harten-Hyman entropy fix where the corresponding wave is a
+    transonic rarefaction.
+
+    lam:    eigenvalue of the Roe matrix
+    lamL:   eigenvalue of the left state
+    lamR:   eigenvalue of the right state
+    """
+
+    delta = np.maximum(0.0, np.maximum(lam - lamL, lamR - lam))
+    absl = np.abs(lam)
+    # avoid dividing by zero where the fix isn't needed
+    fixed = (lam**2 + delta**2) / (2 * np.where(delta > 0, delta, 1.0))
+
+    return np.where(absl < delta, fixed, absl)
+
+
+def _interface_states(a, axis, boundary):
+    """
+    Get the states left and right of all cell interfaces along axis of the
+    array a, including the interfaces at the boundaries of the box.
+
+    returns:
+        left, right:    arrays with one element more than a along axis
+    """
+
+    n = a.shape[axis]
+
+    if boundary == "periodic":
+        indices = np.arange(-1, n + 1) % n
+    elif boundary == "transmissive":
+        indices = np.clip(np.arange(-1, n + 1), 0, n - 1)
+    else:
+        raise ValueError("Unknown boundary '{0}'".format(boundary))
+
+    left = np.take(a, indices[:-1], axis=axis)
+    right = np.take(a, indices[1:], axis=axis)
+
+    return left, right
@@ -6,136 +6,2078 @@
 # -------------------------------------------------------
 
 
+import bz2
+import collections
+import concurrent.futures
 import copy
+import gzip
+import hashlib
+import io
+import itertools
+import json
+import lzma
+import os
 import numpy as np
 
+from .mesh_hydro_utilities import split_output_name
+
+
+# Number of lines formatted at once when writing IC files.
+_WRITE_CHUNK_ROWS = 65536
+# Number of lines decoded at once when reading fixed width output files.
+_DECODE_CHUNK_ROWS = 4096
+
+# Chunk size along each dimension of the datasets in HDF5 files.
+_HDF5_CHUNK_CELLS = {1: 65536, 2: 256}
+# The first bytes of every HDF5 file.
+_HDF5_SIGNATURE = b"\x89HDF\r\n\x1a\n"
+
+# Leading bytes and file name extensions of the supported compression formats.
+_COMPRESSION_MAGIC = {
+    "gzip": b"\x1f\x8b",
+    "bz2": b"BZh",
+    "xz": b"\xfd7zXZ\x00",
+    "zstd": b"\x28\xb5\x2f\xfd",
+}
+_COMPRESSION_SUFFIXES = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz", ".zst": "zstd"}
+
+# Settings of the on-disk cache of decoded output files. The cache is
+# disabled as long as "dir" is None. See enable_output_cache.
+_output_cache = {"dir": None, "maxsize": 0}
+
 
 def write_ic(fname, ndim, rho, u, p):
     """
-    Write an (arbitrary type) IC file.
+    Write an (arbitrary type) IC file. If fname ends with .hdf5 or .h5, an
+    HDF5 file is written instead of the text format. See write_hdf5. If
+    fname ends with .gz, .bz2, .xz, or .zst, the text is compressed while it
+    is written.
+
+    In 2D, the arrays are indexed [i, j], with i along the x axis. read_ic
+    returns them indexed [j, i], for text and HDF5 files alike.
+
+    fname:  filename to be written
+    ndim:   number of dimensions
+    rho:    numpy array for density
+    u:      numpy array for velocity
+    p:      numpy array for pressure
+
+    returns:
+        Nothing
+    """
+
+    if fname.endswith((".hdf5", ".h5")):
+        if ndim == 2:
+            # write_hdf5 stores the arrays indexed [j, i], as read_output
+            # returns them
+            rho = rho.T
+            u = u.transpose(1, 0, 2)
+            p = p.T
+        write_hdf5(fname, ndim, rho, u, p)
+        return
+
+    nx = rho.shape[0]
+
+    with _open_file(fname, "w") as f:
+        f.write("filetype = arbitrary\n")
+        f.write("ndim = {0:d}\n".format(ndim))
+        f.write("nx = {0:d}\n".format(nx))
+        f.write("\n")
+
+        if ndim == 1:
+            for start in range(0, nx, _WRITE_CHUNK_ROWS):
+                stop = min(start + _WRITE_CHUNK_ROWS, nx)
+                block = np.empty((stop - start, 3), dtype=float)
+                block[:, 0] = rho[start:stop]
+                block[:, 1] = u[start:stop]
+                block[:, 2] = p[start:stop]
+                f.write(_format_rows(block))
+
+        elif ndim == 2:
+            # Lines are written with i running fastest, i.e. line j * nx + i
+            # contains cell [i, j]. Work on chunks of full j-rows at a time.
+            jchunk = max(1, _WRITE_CHUNK_ROWS // nx)
+            for start in range(0, nx, jchunk):
+                stop = min(start + jchunk, nx)
+                block = np.empty((stop - start, nx, 4), dtype=float)
+                block[:, :, 0] = rho[:, start:stop].T
+                block[:, :, 1] = u[:, start:stop, 0].T
+                block[:, :, 2] = u[:, start:stop, 1].T
+                block[:, :, 3] = p[:, start:stop].T
+                f.write(_format_rows(block.reshape((-1, 4))))
+
+    return
+
+
+def _format_rows(block):
+    """
+    Format a 2D array of shape (nrows, ncols) into lines of "{0:12.6f}"
+    formatted columns, separated by a single space, one line per row.
+
+    The characters are assembled directly in a numpy array whenever all
+    values fit into 12 characters. Otherwise, all rows are formatted with a
+    single call to the % operator, which yields the same characters as
+    str.format per value.
+
+    returns:
+        string containing all formatted lines
+    """
+
+    nrows, ncols = block.shape
+
+    chars = _format_fixed_12_6(block.ravel())
+    if chars is None:
+        rowfmt = " ".join(["%12.6f"] * ncols) + "\n"
+        return (rowfmt * nrows) % tuple(block.ravel().tolist())
+
+    lines = np.empty((nrows, ncols, 13), dtype=np.uint8)
+    lines[:, :, :12] = chars.reshape((nrows, ncols, 12))
+    lines[:, :, 12] = ord(" ")
+    lines[:, -1, 12] = ord("\n")
+
+    return lines.tobytes().decode("ascii")
+
+
+def _format_fixed_12_6(values):
+    """
+    Format a 1D array of floats as "{0:12.6f}" would, but for all values
+    at once. Returns a (nvalues, 12) uint8 array of ASCII characters, or
+    None if some values don't fit in 12 characters (or aren't finite).
+
+    Values whose rounding to 6 decimals can't be decided safely from
+    value * 1e6 are formatted individually with the % operator.
+    """
+
+    if not np.all(np.isfinite(values)):
+        return None
+
+    scaled = np.abs(values) * 1e6
+    negative = np.signbit(values)
+    # at most 5 digits before the decimal point, 4 if we need a sign
+    limit = np.where(negative, 1e10 - 1, 1e11 - 1)
+    if np.any(scaled >= limit):
+        return None
+
+    n = np.rint(scaled).astype(np.int64)
+    intpart = (n // 1000000).astype(np.uint32)
+    fracpart = (n % 1000000).astype(np.uint32)
+
+    # build the characters column by column, one contiguous row per column
+    nvals = values.shape[0]
+    columns = np.empty((12, nvals), dtype=np.uint8)
+    columns[5] = ord(".")
+    for k in range(6):
+        columns[11 - k] = fracpart % 10 + ord("0")
+        fracpart //= 10
+
+    columns[4] = intpart % 10 + ord("0")
+    intpart //= 10
+    # position of the leading digit
+    lead = np.full(nvals, 4, dtype=np.intp)
+    for k in range(1, 5):
+        nonzero = intpart > 0
+        columns[4 - k] = np.where(nonzero, intpart % 10 + ord("0"), ord(" "))
+        lead -= nonzero
+        intpart //= 10
+
+    rows = np.flatnonzero(negative)
+    columns[lead[rows] - 1, rows] = ord("-")
+
+    chars = columns.T.copy()
+
+    # fix up values too close to a rounding tie
+    frac = scaled - np.floor(scaled)
+    ambiguous = np.flatnonzero(np.abs(frac - 0.5) <= 2 * np.spacing(scaled))
+    for a in ambiguous:
+        chars[a] = np.frombuffer(("%12.6f" % values[a]).encode("ascii"), np.uint8)
+
+    return chars
+
+
+class Snapshot:
+    """
+    An output file of the hydro code. The metadata are read from the header
+    when the object is created. The fields are only decoded when they are
+    accessed for the first time, and are kept afterwards.
+
+    fname:      filename of the output
+    region:     if not None, only read the cells in this region. See
+                read_output.
+    dtype:      data type of the fields. See read_output.
+
+    attributes:
+        fname:      filename of the output
+        ndim:       integer of how many dimensions we have
+        nx:         number of cells per dimension in the file
+        t:          time of the output
+        step:       current step of the simulation
+        rho:        numpy array for density
+        u:          numpy array for velocity. In 1D: is 1D array. In 2D: is 2D
+                    array containing both ux and uy
+        p:          numpy array for pressure
+    """
+
+    __slots__ = (
+        "fname",
+        "region",
+        "dtype",
+        "ndim",
+        "nx",
+        "t",
+        "step",
+        "_rho",
+        "_u",
+        "_p",
+    )
+
+    def __init__(self, fname, region=None, dtype=float):
+        check_file_exists(fname)
+
+        self.fname = fname
+        self.region = region
+        self.dtype = np.dtype(dtype)
+
+        if _is_hdf5(fname):
+            self.ndim, self.nx, self.t, self.step = _read_hdf5_header(fname)
+        else:
+            with _open_file(fname, "rb") as f:
+                self.ndim, self.nx, self.t, self.step = _read_output_header(f, fname)
+
+        self._rho = None
+        self._u = None
+        self._p = None
+
+    def __repr__(self):
+        return "Snapshot('{0}', ndim={1:d}, nx={2:d}, t={3:g}, step={4:d})".format(
+            self.fname, self.ndim, self.nx, self.t, self.step
+        )
+
+    @property
+    def rho(self):
+        if self._rho is None:
+            self.load(("rho",))
+        return self._rho
+
+    @property
+    def u(self):
+        if self._u is None:
+            self.load(("u",))
+        return self._u
+
+    @property
+    def p(self):
+        if self._p is None:
+            self.load(("p",))
+        return self._p
+
+    def load(self, fields=None):
+        """
+        Decode the given fields, if they haven't been decoded yet, in a
+        single pass over the file. If fields is None, decode all of them.
+        """
+
+        fields = _check_output_fields(fields)
+        missing = tuple(f for f in fields if getattr(self, "_" + f) is None)
+        if len(missing) == 0:
+            return
+
+        data = _read_output_fields(self.fname, missing, self.region, self.dtype)
+        for field in missing:
+            setattr(self, "_" + field, data[field])
+
+        return
+
+    def unload(self):
+        """
+        Drop all decoded fields.
+        """
+        self._rho = None
+        self._u = None
+        self._p = None
+
+
+def read_output(fname, region=None, fields=None, dtype=float):
+    """
+    Read the given output file. Both the text outputs of the hydro code and
+    HDF5 files written by write_hdf5 can be read, as well as text outputs
+    compressed with gzip, bz2, xz, or zstd, which are decompressed on the fly.
+    The format is detected from the file contents.
+
+    fname:      filename to be read
+    region:     if not None, only read the cells in this region. In 1D, a
+                tuple (i0, i1), in 2D a tuple (i0, i1, j0, j1), where i is the
+                index along the x axis and j along the y axis. Intervals are
+                half-open, like python slices. For 2D outputs, the returned
+                arrays have shape (j1 - j0, i1 - i0), i.e. they are equal to
+                the full arrays sliced with [j0:j1, i0:i1]. For HDF5 files,
+                only the chunks overlapping the region are read.
+    fields:     if not None, only read these fields. Iterable containing any
+                of "rho", "u", "p". Fields that aren't read are returned as
+                None.
+    dtype:      data type of the returned arrays. The outputs only contain 6
+                decimals, so np.float32 halves the memory at little loss.
+                Values are decoded as float64 first, then rounded.
+
+    returns:
+        ndim:       integer of how many dimensions we have
+        rho:        numpy array for density
+        u:          numpy array for velocity. In 1D: is 1D array. In 2D: is 2D array containing
+                    both ux and uy
+        p:          numpy array for pressure
+        t:          time of the output
+        step:       current step of the simulation
+    """
+
+    snap = Snapshot(fname, region=region, dtype=dtype)
+    snap.load(fields)
+
+    return snap.ndim, snap._rho, snap._u, snap._p, snap.t, snap.step
+
+
+def read_outputs(
+    filelist, workers=None, region=None, fields=None, max_pending=None, dtype=float
+):
+    """
+    Read all output files in filelist in parallel, using a pool of worker
+    processes. This is a generator: The results are yielded in the order of
+    filelist as soon as they are available, while the remaining files are
+    still being read.
+
+    filelist:       list of output file names
+    workers:        number of worker processes. If None, use os.cpu_count().
+                    If 1, read the files in this process.
+    region:         passed on to read_output
+    fields:         passed on to read_output
+    max_pending:    maximal number of files being read or waiting to be
+                    yielded at any time. This bounds the memory used by
+                    results that have been read, but not yet consumed.
+                    If None, use 2 * workers.
+    dtype:          passed on to read_output
+
+    yields:
+        the tuple (ndim, rho, u, p, t, step) returned by read_output for
+        every file in filelist
+    """
+
+    if workers is None:
+        workers = os.cpu_count()
+    workers = max(1, min(workers, len(filelist)))
+
+    if workers == 1:
+        for fname in filelist:
+            yield read_output(fname, region=region, fields=fields, dtype=dtype)
+        return
+
+    if max_pending is None:
+        max_pending = 2 * workers
+    max_pending = max(1, max_pending)
+
+    executor = concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_output_worker,
+        initargs=(dict(_output_cache),),
+    )
+    results = _read_outputs_ahead(
+        executor, filelist, max_pending, region, fields, dtype
+    )
+
+    try:
+        for fname, result in results:
+            yield result
+    finally:
+        # stop reading ahead if the caller stops early
+        results.close()
+
+    return
+
+
+def prefetch_outputs(filelist, lookahead=2, region=None, fields=None, dtype=float):
+    """
+    Iterate over the output files in filelist, reading the next lookahead
+    files in a background thread while the current one is being used. This
+    overlaps reading the files with whatever the caller does with them,
+    e.g. plotting. Use it as a replacement for
+
+        for fname in filelist:
+            ndim, rho, u, p, t, step = read_output(fname)
+
+    namely
+
+        for fname, (ndim, rho, u, p, t, step) in prefetch_outputs(filelist):
+
+    filelist:   list or iterable of output file names. File names are
+                taken from iterables only when they are submitted for
+                reading, so it may be e.g. a generator of new outputs.
+    lookahead:  maximal number of files that are read ahead. At most
+                lookahead + 1 outputs are kept in memory at any time.
+    region:     passed on to read_output
+    fields:     passed on to read_output
+    dtype:      passed on to read_output
+
+    yields:
+        fname:  the file name
+        result: the tuple (ndim, rho, u, p, t, step) returned by read_output
+    """
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+    # closing this generator closes the delegate, which shuts down the
+    # executor
+    yield from _read_outputs_ahead(
+        executor, filelist, max(1, lookahead), region, fields, dtype
+    )
+
+    return
+
+
+def _read_outputs_ahead(executor, filelist, max_pending, region, fields, dtype):
+    """
+    Read the output files in filelist using the given executor, keeping at
+    most max_pending files submitted to it. filelist may be any iterable;
+    file names are taken from it only when they are submitted. Yields the
+    pairs (fname, read_output result) in the order of filelist. The
+    executor is shut down when the generator finishes or is closed.
+    """
+
+    # pairs (fname, future) of the submitted files
+    pending = collections.deque()
+    files = iter(filelist)
+
+    try:
+        for fname in itertools.islice(files, max_pending):
+            future = executor.submit(read_output, fname, region, fields, dtype)
+            pending.append((fname, future))
+
+        while len(pending) > 0:
+            fname, future = pending.popleft()
+            result = future.result()
+            for nextname in itertools.islice(files, 1):
+                future = executor.submit(read_output, nextname, region, fields, dtype)
+                pending.append((nextname, future))
+            yield fname, result
+
+    finally:
+        # don't keep reading if the caller stopped early
+        for fname, future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+    return
+
+
+def _init_output_worker(cache):
+    """
+    Set up a worker process of read_outputs with the same output cache
+    settings as the main process.
+    """
+
+    _output_cache.update(cache)
+
+    return
+
+
+class SnapshotSeries:
+    """
+    All outputs of a run, consolidated into one memory-mapped array per field
+    with the time as first axis. The consolidated store is written once, the
+    first time a series of files is opened, and reused afterwards as long as
+    none of the files changed. Only the parts of the arrays that are actually
+    accessed are read from disk.
+
+    filelist:   list of output file names, in the order they should appear
+                in the series. All outputs need to have the same ndim and nx.
+    store:      directory to keep the consolidated arrays in. If None, use
+                <basename>-series next to the first output, where basename
+                is everything before -XXXX.out (see split_output_name).
+                For files not named like outputs, it is the file name
+                without its extension.
+    workers:    number of processes used to read the outputs when the store
+                needs to be written. See read_outputs.
+    dtype:      data type the fields are stored with. A store written with a
+                different dtype is rewritten.
+
+    attributes:
+        filelist:   list of output file names
+        ndim:       integer of how many dimensions we have
+        nx:         number of cells per dimension
+        times:      numpy array of the times of the outputs
+        steps:      numpy array of the steps of the outputs
+        rho:        memory-mapped array for density, shape (nt, nx) in 1D,
+                    (nt, nx, nx) in 2D
+        u:          memory-mapped array for velocity, shape (nt, nx) in 1D,
+                    (nt, nx, nx, 2) in 2D
+        p:          memory-mapped array for pressure, same shape as rho
+    """
+
+    _index_file = "index.json"
+
+    def __init__(self, filelist, store=None, workers=None, dtype=float):
+        if len(filelist) == 0:
+            raise ValueError("Need at least one output file for a series")
+
+        self.filelist = list(filelist)
+
+        if store is None:
+            first = self.filelist[0]
+            try:
+                basename, snapshot = split_output_name(first)
+            except ValueError:
+                # e.g. HDF5 files
+                basename = os.path.basename(_strip_compression_suffix(first))
+                basename = os.path.splitext(basename)[0]
+            store = os.path.join(os.path.dirname(first), basename + "-series")
+        self.store = store
+
+        files = []
+        for fname in self.filelist:
+            check_file_exists(fname)
+            stat = os.stat(fname)
+            files.append([os.path.abspath(fname), stat.st_size, stat.st_mtime_ns])
+
+        dtype = np.dtype(dtype)
+        index = self._read_index()
+        if (
+            index is None
+            or index["files"] != files
+            or index.get("dtype", "float64") != dtype.name
+        ):
+            index = self._consolidate(files, workers, dtype)
+
+        self.ndim = index["ndim"]
+        self.nx = index["nx"]
+        self.times = np.load(os.path.join(self.store, "times.npy"))
+        self.steps = np.load(os.path.join(self.store, "steps.npy"))
+        self.rho = np.load(os.path.join(self.store, "rho.npy"), mmap_mode="r")
+        self.u = np.load(os.path.join(self.store, "u.npy"), mmap_mode="r")
+        self.p = np.load(os.path.join(self.store, "p.npy"), mmap_mode="r")
+
+    def __repr__(self):
+        return "SnapshotSeries('{0}', nt={1:d}, ndim={2:d}, nx={3:d})".format(
+            self.store, len(self), self.ndim, self.nx
+        )
+
+    def __len__(self):
+        return self.times.shape[0]
+
+    def __getitem__(self, key):
+        """
+        Get the outputs with the given time index or slice of time indices.
+
+        returns:
+            rho, u, p, t, step: (memory-mapped) arrays of the selected outputs
+        """
+        return self.rho[key], self.u[key], self.p[key], self.times[key], self.steps[key]
+
+    def nearest(self, t):
+        """
+        Get the index of the output with the time closest to t.
+        """
+        return int(np.argmin(np.abs(self.times - t)))
+
+    def time_slice(self, tmin=None, tmax=None):
+        """
+        Get a slice selecting all outputs with tmin <= time <= tmax. Assumes
+        that the outputs are sorted by time. Missing bounds are unlimited.
+        """
+
+        start = 0
+        stop = len(self)
+        if tmin is not None:
+            start = int(np.searchsorted(self.times, tmin, side="left"))
+        if tmax is not None:
+            stop = int(np.searchsorted(self.times, tmax, side="right"))
+
+        return slice(start, stop)
+
+    def _read_index(self):
+        """
+        Read the index of the consolidated store, or return None if there is
+        none.
+        """
+
+        try:
+            with open(os.path.join(self.store, self._index_file)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _consolidate(self, files, workers, dtype):
+        """
+        Write all outputs into the consolidated store, and return its index.
+        """
+
+        headers = read_output_headers(self.filelist)
+        ndim, nx = headers[0][:2]
+        for fname, header in zip(self.filelist, headers):
+            if header[:2] != (ndim, nx):
+                raise ValueError(
+                    "Output {0} has ndim={1:d}, nx={2:d}, expected ndim={3:d}, nx={4:d}".format(
+                        fname, header[0], header[1], ndim, nx
+                    )
+                )
+
+        os.makedirs(self.store, exist_ok=True)
+        # the index marks the store as complete, so remove it first
+        _remove_if_exists(os.path.join(self.store, self._index_file))
+
+        nt = len(self.filelist)
+        shape = (nt,) + (nx,) * ndim
+        ushape = shape
+        if ndim == 2:
+            ushape = shape + (2,)
+
+        arrays = {}
+        for field, fshape in (("rho", shape), ("u", ushape), ("p", shape)):
+            arrays[field] = np.lib.format.open_memmap(
+                os.path.join(self.store, field + ".npy"),
+                mode="w+",
+                dtype=dtype,
+                shape=fshape,
+            )
+
+        for k, (ndim, rho, u, p, t, step) in enumerate(
+            read_outputs(self.filelist, workers=workers, dtype=dtype)
+        ):
+            arrays["rho"][k] = rho
+            arrays["u"][k] = u
+            arrays["p"][k] = p
+
+        for array in arrays.values():
+            array.flush()
+        del arrays
+
+        np.save(os.path.join(self.store, "times.npy"), [h[2] for h in headers])
+        np.save(os.path.join(self.store, "steps.npy"), [h[3] for h in headers])
+
+        index = {"ndim": ndim, "nx": nx, "dtype": dtype.name, "files": files}
+        with open(os.path.join(self.store, self._index_file), "w") as f:
+            json.dump(index, f)
+
+        return index
+
+
+def read_output_header(fname):
+    """
+    Read only the metadata in the header of the given output file, without
+    touching the data in the file body.
+
+    returns:
+        ndim:       integer of how many dimensions we have
+        nx:         number of cells per dimension
+        t:          time of the output
+        step:       current step of the simulation
+        size:       size of the file in bytes, as stored on disk
+    """
+
+    check_file_exists(fname)
+
+    if _is_hdf5(fname):
+        ndim, nx, t, step = _read_hdf5_header(fname)
+        return ndim, nx, t, step, os.path.getsize(fname)
+
+    with _open_file(fname, "rb") as f:
+        ndim, nx, t, step = _read_output_header(f, fname)
+    size = os.path.getsize(fname)
+
+    return ndim, nx, t, step, size
+
+
+def read_output_headers(filelist):
+    """
+    Read the metadata of all output files in filelist. See
+    read_output_header.
+
+    returns:
+        list containing a tuple (ndim, nx, t, step, size) for every file in
+        filelist, in the same order.
+    """
+
+    return [read_output_header(fname) for fname in filelist]
+
+
+def output_is_complete(fname):
+    """
+    Check whether the output file fname has been written completely, by
+    comparing its size with the size expected from its header. Useful to
+    decide whether an output of a running simulation can be read yet.
+
+    returns:
+        True if the file is complete, False if it isn't (yet), and None if
+        that can't be decided from the size of the file, i.e. for
+        compressed files, HDF5 files, and text files that don't have the
+        fixed width layout.
+    """
+
+    try:
+        if _is_hdf5(fname):
+            return None
+        with _open_file(fname, "rb") as f:
+            if not isinstance(f, io.BufferedReader):
+                return None
+            ndim, nx, t, step = _read_output_header(f, fname)
+            start = _skip_body_comments(f)
+            size = os.fstat(f.fileno()).st_size
+    except (OSError, ValueError):
+        # the header is still being written
+        return False
+
+    rowlen = (2 * ndim + 2) * 13
+    expected = start + nx**ndim * rowlen
+    if size < expected:
+        return False
+    elif size == expected:
+        return True
+    else:
+        return None
+
+
+def read_output_blocks(fname, max_bytes=64 * 1024**2, fields=None, dtype=float):
+    """
+    Read the given output file in blocks of contiguous rows, so that outputs
+    larger than the available memory can be processed. This is a generator.
+    For 2D outputs, a block contains all cells [j0:j1, :], i.e. complete
+    rows along the x axis. For 1D outputs, a block contains the cells
+    [j0:j1].
+
+    fname:      filename to be read
+    max_bytes:  approximate upper limit for the memory used per block,
+                including the raw text. Blocks contain at least one row.
+    fields:     if not None, only read these fields. See read_output.
+    dtype:      data type of the returned arrays. See read_output.
+
+    yields:
+        j0, j1:     first and last + 1 index of the rows in the block
+        rho:        numpy array for density in the block
+        u:          numpy array for velocity in the block. In 2D: contains
+                    both ux and uy
+        p:          numpy array for pressure in the block
+    """
+
+    check_file_exists(fname)
+    fields = _check_output_fields(fields)
+
+    dtype = np.dtype(dtype)
+
+    if _is_hdf5(fname):
+        yield from _read_hdf5_blocks(fname, max_bytes, fields, dtype)
+        return
+
+    with _open_file(fname, "rb") as f:
+        ndim, nx, t, step = _read_output_header(f, fname)
+        usecols = _get_output_usecols(ndim, fields)
+
+        ncols = 2 * ndim + 2
+        rowlen = ncols * 13
+        # number of rows of cells along the y axis (2D) or of cells (1D)
+        nrows = nx
+        cells_per_row = 1 if ndim == 1 else nx
+
+        # raw text, decoded columns, and the arrays handed out
+        bytes_per_row = cells_per_row * (rowlen + 8 * len(usecols))
+        bytes_per_row += cells_per_row * dtype.itemsize * len(usecols)
+        rows_per_block = max(1, max_bytes // bytes_per_row)
+
+        start = _skip_body_comments(f)
+        fixed_width = _is_fixed_width(f, start, nx**ndim, rowlen)
+
+        for j0 in range(0, nrows, rows_per_block):
+            j1 = min(j0 + rows_per_block, nrows)
+            ncells = (j1 - j0) * cells_per_row
+
+            data = None
+            if fixed_width:
+                buf = f.read(ncells * rowlen)
+                data = _decode_fixed_width(buf, ncells, ncols, usecols, dtype)
+                if data is None:
+                    # rows don't have the expected layout after all. Go back
+                    # and continue line by line.
+                    f.seek(start + j0 * cells_per_row * rowlen)
+                    fixed_width = False
+
+            if data is None:
+                lines = [line.decode() for line in itertools.islice(f, ncells)]
+                data = np.loadtxt(lines, usecols=usecols, dtype=float, ndmin=2)
+                data = data.astype(dtype, copy=False)
+                if data.shape[0] != ncells:
+                    raise ValueError(
+                        "Got {0:d} rows for cells {1:d} to {2:d} in '{3}'".format(
+                            data.shape[0],
+                            j0 * cells_per_row,
+                            j1 * cells_per_row,
+                            fname,
+                        )
+                    )
+
+            if ndim == 1:
+                shape = (ncells,)
+            else:
+                shape = (j1 - j0, nx)
+            block = _assemble_output_fields(data, ndim, fields, usecols, shape)
+
+            yield j0, j1, block.get("rho"), block.get("u"), block.get("p")
+
+    return
+
+
+def output_sum(fname, field, max_bytes=64 * 1024**2):
+    """
+    Compute the sum over all cells of a field of the given output file,
+    reading it block by block. See read_output_blocks.
+
+    field:      "rho", "u", or "p"
+
+    returns:
+        the sum. For the velocity in 2D: array of the sums of both components
+    """
+
+    total = 0.0
+    for j0, j1, rho, u, p in read_output_blocks(fname, max_bytes, (field,)):
+        values = {"rho": rho, "u": u, "p": p}[field]
+        total = total + _sum_cells(values, field)
+
+    return total
+
+
+def output_minmax(fname, field, max_bytes=64 * 1024**2):
+    """
+    Find the minimum and maximum over all cells of a field of the given
+    output file, reading it block by block. See read_output_blocks.
+
+    field:      "rho", "u", or "p"
+
+    returns:
+        vmin, vmax: minimum and maximum. For the velocity in 2D: arrays for
+                    both components
+    """
+
+    vmin = None
+    vmax = None
+    for j0, j1, rho, u, p in read_output_blocks(fname, max_bytes, (field,)):
+        values = {"rho": rho, "u": u, "p": p}[field]
+        bmin, bmax = _minmax_cells(values, field)
+        if vmin is None:
+            vmin, vmax = bmin, bmax
+        else:
+            vmin = np.minimum(vmin, bmin)
+            vmax = np.maximum(vmax, bmax)
+
+    return vmin, vmax
+
+
+def output_histogram(
+    fname, field, bins=10, bins_range=None, component=0, max_bytes=64 * 1024**2
+):
+    """
+    Compute the histogram over all cells of a field of the given output file,
+    reading it block by block. See read_output_blocks.
+
+    field:      "rho", "u", or "p"
+    bins:       number of bins, or array of bin edges. See np.histogram.
+    bins_range: (min, max) of the bins. If None and bins isn't an array of
+                edges, the file is read twice: once to find the range.
+                Same as the range parameter of np.histogram.
+    component:  which velocity component to use for 2D outputs
+
+    returns:
+        hist:       numpy array of the counts per bin
+        bin_edges:  numpy array of the bin edges
+    """
+
+    if bins_range is None and np.ndim(bins) == 0:
+        vmin, vmax = output_minmax(fname, field, max_bytes)
+        if np.ndim(vmin) > 0:
+            vmin, vmax = vmin[component], vmax[component]
+        bins_range = (vmin, vmax)
+
+    bin_edges = np.histogram_bin_edges([], bins=bins, range=bins_range)
+    hist = np.zeros(bin_edges.shape[0] - 1, dtype=np.int64)
+
+    for j0, j1, rho, u, p in read_output_blocks(fname, max_bytes, (field,)):
+        values = {"rho": rho, "u": u, "p": p}[field]
+        if field == "u" and values.ndim == 3:
+            values = values[:, :, component]
+        hist += np.histogram(values, bins=bin_edges)[0]
+
+    return hist, bin_edges
+
+
+def _sum_cells(values, field):
+    """
+    Sum the values of a field over all cells, per velocity component.
+    """
+    if field == "u" and values.ndim == 3:
+        return np.sum(values, axis=(0, 1))
+    return np.sum(values)
+
+
+def _minmax_cells(values, field):
+    """
+    Get min and max of the values of a field over all cells, per velocity
+    component.
+    """
+    if field == "u" and values.ndim == 3:
+        return np.min(values, axis=(0, 1)), np.max(values, axis=(0, 1))
+    return np.min(values), np.max(values)
+
+
+def _read_output_fields(fname, fields, region=None, dtype=float):
+    """
+    Decode the given fields of an output file. See read_output for the
+    parameters. If the output cache is enabled, the data are taken from the
+    cache if possible, and stored in it otherwise, unless only a region is
+    read. HDF5 files are read directly and bypass the cache.
+
+    returns:
+        data:   dict containing a numpy array for every field in fields
+    """
+
+    fields = _check_output_fields(fields)
+
+    if _is_hdf5(fname):
+        return _read_hdf5_fields(fname, fields, region, dtype=dtype)
+
+    with _open_file(fname, "rb") as f:
+        ndim, nx, t, step = _read_output_header(f, fname)
+        usecols = _get_output_usecols(ndim, fields)
+
+        if _output_cache["dir"] is not None:
+            # the cache always holds all fields of the complete grid
+            allcols = _get_output_usecols(ndim, ("rho", "u", "p"))
+            data = _output_cache_load(fname, dtype)
+            if data is None and region is not None:
+                # don't decode the complete grid just to cache it
+                data, shape = _read_output_region(f, ndim, nx, region, usecols, dtype)
+            else:
+                if data is None:
+                    data = _decode_output_body(f.read(), ndim, nx, allcols, dtype)
+                    _output_cache_store(fname, data)
+                usecols = allcols
+                shape = (nx,) * ndim
+                if region is not None:
+                    data, shape = _select_region(data, ndim, nx, region)
+            # the same as the memory-mapped entries, whether or not data
+            # were just decoded or copied to select the region
+            data.flags.writeable = False
+
+        elif region is None:
+            body = f.read()
+            data = _decode_output_body(body, ndim, nx, usecols, dtype)
+            shape = (nx,) * ndim
+        else:
+            data, shape = _read_output_region(f, ndim, nx, region, usecols, dtype)
+
+    return _assemble_output_fields(data, ndim, fields, usecols, shape)
+
+
+def _assemble_output_fields(data, ndim, fields, usecols, shape):
+    """
+    Turn the decoded columns usecols of an output file into arrays for the
+    given fields. The arrays are views into data, without copies: In 2D,
+    the velocity is the (strided) view of the adjacent ux and uy columns.
+
+    data:   numpy array of shape (ncells, len(usecols))
+    shape:  shape of the grid of the cells
+
+    returns:
+        dict containing a numpy array for every field in fields
+    """
+
+    result = {}
+
+    if "rho" in fields:
+        result["rho"] = data[:, usecols.index(ndim)].reshape(shape)
+
+    if "u" in fields:
+        col = usecols.index(ndim + 1)
+        if ndim == 1:
+            result["u"] = data[:, col]
+        elif ndim == 2:
+            result["u"] = data[:, col : col + 2].reshape(shape + (2,))
+
+    if "p" in fields:
+        result["p"] = data[:, usecols.index(2 * ndim + 1)].reshape(shape)
+
+    return result
+
+
+def _check_output_fields(fields):
+    """
+    Check the fields requested from an output file.
+
+    returns:
+        fields:     tuple of requested field names. All fields if fields is None.
+    """
+
+    known = ("rho", "u", "p")
+    if fields is None:
+        return known
+
+    if isinstance(fields, str):
+        fields = (fields,)
+    if len(fields) == 0:
+        raise ValueError("Need at least one field to read")
+    for field in fields:
+        if field not in known:
+            raise ValueError(
+                "Unknown field '{0}'. Known fields are {1}".format(field, known)
+            )
+
+    return tuple(field for field in known if field in fields)
+
+
+def _get_output_usecols(ndim, fields):
+    """
+    Get the indices of the columns of an output file that contain the
+    given fields, in the order rho, u, p.
+    """
+
+    # x, (y,) rho, u (ndim columns), p
+    first = {"rho": ndim, "u": ndim + 1, "p": 2 * ndim + 1}
+    width = {"rho": 1, "u": ndim, "p": 1}
+
+    usecols = []
+    for field in fields:
+        usecols += range(first[field], first[field] + width[field])
+
+    return tuple(usecols)
+
+
+def _read_output_region(f, ndim, nx, region, usecols, dtype=float):
+    """
+    Read the cells in the given region from the open output file handle f,
+    which must be positioned after the header. See read_output for the
+    format of region. Only the columns usecols are decoded.
+
+    If the file has the fixed width layout, only the rows containing the
+    region are read, seeking directly to their offsets. Otherwise, the
+    whole body is decoded and the region is selected afterwards.
+
+    returns:
+        data:   numpy array of shape (ncells, len(usecols)) containing the
+                columns usecols of the cells in the region
+        shape:  shape of the region grid
+    """
+
+    i0, i1, j0, j1, shape = _get_region_bounds(ndim, nx, region)
+
+    ncols = 2 * ndim + 2
+    rowlen = ncols * 13
+    nrows = nx**ndim
+
+    start = _skip_body_comments(f)
+
+    if _is_fixed_width(f, start, nrows, rowlen):
+        # fixed width: read only the rows we need
+        buf = bytearray()
+        for j in range(j0, j1):
+            f.seek(start + (j * nx + i0) * rowlen)
+            buf += f.read((i1 - i0) * rowlen)
+
+        data = _decode_fixed_width(buf, len(buf) // rowlen, ncols, usecols, dtype)
+        if data is not None:
+            return data, shape
+
+    # otherwise, read everything and select the region afterwards
+    f.seek(start)
+    data = _decode_output_body(f.read(), ndim, nx, usecols, dtype)
+
+    return _select_region(data, ndim, nx, region)
+
+
+def _skip_body_comments(f):
+    """
+    Skip the comment and empty lines following the metadata of the output
+    file handle f, i.e. the line containing the column names.
+
+    returns:
+        start:  offset of the first row of data. f is positioned there.
+    """
+
+    start = f.tell()
+    line = f.readline()
+    while line.startswith(b"#") or (len(line) > 0 and _line_is_empty(line.decode())):
+        start = f.tell()
+        line = f.readline()
+    f.seek(start)
+
+    return start
+
+
+def _is_fixed_width(f, start, nrows, rowlen):
+    """
+    Check whether the size of the output file f matches nrows rows of length
+    rowlen after the first row of data at offset start. Compressed files are
+    never treated as fixed width, since seeking in them means decompressing
+    everything up to the target offset.
+    """
+
+    if not isinstance(f, io.BufferedReader):
+        return False
+
+    filesize = os.fstat(f.fileno()).st_size
+    return filesize - start == nrows * rowlen
+
+
+def _select_region(data, ndim, nx, region):
+    """
+    Select the cells in the given region from the decoded data of a complete
+    output file. See read_output for the format of region.
+
+    data:   numpy array of shape (nx**ndim, ncols)
+
+    returns:
+        data:   numpy array of shape (ncells, ncols) containing the
+                cells in the region
+        shape:  shape of the region grid
+    """
+
+    i0, i1, j0, j1, shape = _get_region_bounds(ndim, nx, region)
+
+    data = data.reshape((nx,) * ndim + (data.shape[1],))
+    if ndim == 1:
+        data = data[i0:i1]
+    else:
+        data = data[j0:j1, i0:i1].reshape((-1, data.shape[-1]))
+
+    return data, shape
+
+
+def _get_region_bounds(ndim, nx, region):
+    """
+    Check the region requested from an output file. See read_output for the
+    format of region.
+
+    returns:
+        i0, i1:     bounds along the x axis
+        j0, j1:     bounds along the y axis. (0, 1) in 1D.
+        shape:      shape of the region grid
+    """
+
+    if len(region) != 2 * ndim:
+        raise ValueError(
+            "Need {0:d} region bounds for {1:d}D output, got {2}".format(
+                2 * ndim, ndim, region
+            )
+        )
+    for low, high in zip(region[::2], region[1::2]):
+        if low < 0 or high > nx or low >= high:
+            raise ValueError("Invalid region {0} for nx = {1:d}".format(region, nx))
+
+    i0, i1 = region[0], region[1]
+    if ndim == 1:
+        j0, j1 = 0, 1
+        shape = (i1 - i0,)
+    else:
+        j0, j1 = region[2], region[3]
+        shape = (j1 - j0, i1 - i0)
+
+    return i0, i1, j0, j1, shape
+
+
+def _read_output_header(f, fname):
+    """
+    Read the header of an output file from the open binary file handle f.
+    The handle is left positioned right after the last metadata line.
+    fname is the name of the file, used in error messages.
+
+    returns:
+        ndim:       integer of how many dimensions we have
+        nx:         number of cells per dimension
+        t:          time of the output
+        step:       current step of the simulation
+    """
+
+    nx = None
+    ndim = None
+    t = None
+    step = None
+
+    linecount = 0
+    while True:
+        # safety measure
+        linecount += 1
+        if linecount > 1000:
+            print(
+                "================ Got to linecount = 1000 without having found all metadata. Wtf? Exiting now."
+            )
+            print("got nx:", nx)
+            print("got ndim", ndim)
+            print("got t:", t)
+            print("got step:", step)
+            quit(1)
+
+        line = f.readline().decode()
+        if len(line) == 0:
+            raise ValueError(
+                "Reached end of file before finding all metadata in '{0}'".format(fname)
+            )
+        clean = _remove_python_style_comments(line)
+        if _line_is_empty(clean):
+            continue
+
+        else:
+            if clean.strip().startswith("x"):  # header name descriptions
+                continue
+            name, eq, value = clean.partition("=")
+            nstr = name.strip()
+            if nstr == "nx":
+                nx = int(value)
+            elif nstr == "ndim":
+                ndim = int(value)
+            elif nstr == "t":
+                t = float(value)
+            elif nstr == "nsteps":
+                step = int(value)
+            else:
+                raise ValueError("Unknown name: '{0}'".format(name))
+
+        if nx is not None and ndim is not None and t is not None and step is not None:
+            break
+
+    if ndim not in (1, 2):
+        raise ValueError("Unknown ndim '{0}'".format(ndim))
+
+    return ndim, nx, t, step
+
+
+def _decode_output_body(body, ndim, nx, usecols, dtype=float):
+    """
+    Decode the body of an output file, given as bytes, i.e. everything that
+    follows the metadata. Uses the fixed width decoder if the rows have the
+    expected layout, and falls back to np.loadtxt otherwise.
+
+    usecols:    indices of the columns to decode
+    dtype:      data type of the returned array. Values are always parsed as
+                float64 first, so that all code paths round the same way.
+
+    returns:
+        data:   numpy array of shape (nx**ndim, len(usecols)) containing
+                the columns usecols.
+    """
+
+    # x, (y,) rho, u (ndim columns), p
+    ncols = 2 * ndim + 2
+
+    data = _decode_fixed_width(body, nx**ndim, ncols, usecols, dtype)
+    if data is None:
+        # The line containing the column names starts with a '#' and is
+        # skipped as a comment, and the coordinate columns are skipped without
+        # being converted.
+        data = np.loadtxt(io.BytesIO(body), usecols=usecols, dtype=float, ndmin=2)
+        data = data.astype(dtype, copy=False)
+
+    return data
+
+
+def _decode_fixed_width(body, nrows, ncols, usecols, dtype=float):
+    """
+    Decode the rows of an output file body, given as bytes, where every
+    row consists of ncols columns written as "{0:12.6f}" and separated by a
+    single space. Leading comment lines are skipped.
+
+    Instead of tokenizing the rows, the fields are read directly from the
+    buffer at their fixed offsets: The 8 characters "d.dddddd" following the
+    leading 4 characters of every field are read as one 64 bit integer, and
+    their digits are combined with a handful of integer operations for all
+    fields at once. Since the digits give the value as an exact integer
+    multiple of 1e-6, dividing by 1e6 yields exactly the same float as
+    parsing the text would.
+
+    returns:
+        data:   numpy array of shape (nrows, len(usecols)) and type dtype,
+                or None if the body doesn't have the expected fixed width
+                layout.
+    """
+
+    width = 13
+    rowlen = ncols * width
+
+    start = _skip_comment_lines(body)
+    if len(body) - start != nrows * rowlen:
+        return None
+
+    # split usecols into runs of adjacent columns
+    runs = []
+    for col, c in enumerate(usecols):
+        if col > 0 and c == usecols[col - 1] + 1:
+            runs[-1][1] += 1
+        else:
+            runs.append([c, 1])
+
+    # work on chunks of rows so that the temporaries stay in the cache
+    data = np.empty((nrows, len(usecols)), dtype=dtype)
+    for first in range(0, nrows, _DECODE_CHUNK_ROWS):
+        last = min(first + _DECODE_CHUNK_ROWS, nrows)
+        offset = start + first * rowlen
+
+        # check separators and row endings
+        seps = np.ndarray(
+            (last - first, ncols),
+            dtype=np.uint8,
+            buffer=body,
+            offset=offset + width - 1,
+            strides=(rowlen, width),
+        )
+        if np.any(seps[:, :-1] != ord(" ")) or np.any(seps[:, -1] != ord("\n")):
+            return None
+
+        col = 0
+        for firstcol, nruncols in runs:
+            ok = _decode_fixed_width_fields(
+                body,
+                offset + firstcol * width,
+                last - first,
+                rowlen,
+                data[first:last, col : col + nruncols],
+            )
+            if not ok:
+                return None
+            col += nruncols
+
+    return data
+
+
+def _decode_fixed_width_fields(body, start, nrows, rowlen, out):
+    """
+    Decode the adjacent "{0:12.6f}" fields of nrows rows of length rowlen,
+    where the first field of the first row begins at index start of body,
+    into the array out of shape (nrows, nfields). See _decode_fixed_width.
+
+    returns:
+        ok:     False if some fields don't have the expected layout.
+    """
+
+    width = 13
+    shape = out.shape
+    strides = (rowlen, width)
+
+    # characters 4 to 11 ("d.dddddd"), little endian: character 4 is the
+    # lowest byte. All operations on it are done in place.
+    low = np.ndarray(
+        shape, dtype="<u8", buffer=body, offset=start + 4, strides=strides
+    ).astype(np.uint64)
+    # characters 0 to 3: spaces, an optional minus sign, digits
+    high = np.ndarray(shape, dtype="<u4", buffer=body, offset=start, strides=strides)
+
+    tmp = np.bitwise_and(low, np.uint64(0xFF00))
+    if np.any(tmp != np.uint64(0x2E00)):
+        # no decimal point at character 5
+        return False
+    # replace the decimal point with a '0'
+    np.bitwise_xor(low, np.uint64(0x2E00 ^ 0x3000), out=low)
+
+    # check that all bytes are digits, i.e. in [0x30, 0x39]
+    invalid = np.add(low, np.uint64(0x4646464646464646), out=tmp)
+    np.bitwise_or(invalid, low, out=invalid)
+    np.subtract(low, np.uint64(0x3030303030303030), out=low)
+    np.bitwise_or(invalid, low, out=invalid)
+    np.bitwise_and(invalid, np.uint64(0x8080808080808080), out=invalid)
+    if np.any(invalid):
+        return False
+
+    # the units digit, to remove it from the 1e6 place later
+    units = np.bitwise_and(low, np.uint64(0xFF), out=invalid)
+
+    # combine the 8 digits into an integer, pairwise
+    np.multiply(low, np.uint64(10 * 2**8 + 1), out=low)
+    np.right_shift(low, np.uint64(8), out=low)
+    np.bitwise_and(low, np.uint64(0x00FF00FF00FF00FF), out=low)
+    np.multiply(low, np.uint64(100 * 2**16 + 1), out=low)
+    np.right_shift(low, np.uint64(16), out=low)
+    np.bitwise_and(low, np.uint64(0x0000FFFF0000FFFF), out=low)
+    np.multiply(low, np.uint64(10000 * 2**32 + 1), out=low)
+    np.right_shift(low, np.uint64(32), out=low)
+
+    # the decimal point counts as a zero at 1e6, and the units digit sits at
+    # 1e7: move it to 1e6 to get the value in units of 1e-6
+    np.multiply(units, np.uint64(9000000), out=units)
+    np.subtract(low, units, out=low)
+    value = low.view(np.int64)
+
+    # Leading characters. Those are all spaces for positive values < 10.
+    # Only look at the others.
+    blanks = np.uint32(0x20202020)
+    nonblank = np.flatnonzero(high != blanks)
+    negative = None
+    if nonblank.size > 0:
+        chars = high.ravel()[nonblank].view(np.uint8).reshape((-1, 4))
+        digits = chars - np.uint8(ord("0"))
+        isdigit = digits <= 9
+        isblank = chars == ord(" ")
+        isminus = chars == ord("-")
+        if not np.all(isdigit | isblank | isminus):
+            return False
+        # anything that isn't a space must be followed by a digit
+        if np.any(~isblank[:, :3] & ~isdigit[:, 1:]):
+            return False
+
+        digits[~isdigit] = 0
+        scale = np.array([10**10, 10**9, 10**8, 10**7], dtype=np.int64)
+        value.ravel()[nonblank] += digits.astype(np.int64) @ scale
+        negative = nonblank[np.any(isminus, axis=1)]
+
+    # exact integer multiples of 1e-6, like parsing the text would give
+    data = value.astype(float)
+    np.divide(data, 1e6, out=data)
+    if negative is not None and negative.size > 0:
+        # negate the floats to keep -0.000000 negative
+        flat = data.ravel()
+        flat[negative] = -flat[negative]
+    out[...] = data
+
+    return True
+
+
+def _skip_comment_lines(body):
+    """
+    Get the index of the first character in body (bytes) that isn't part of
+    a comment line or an empty line.
+    """
+
+    start = 0
+    while start < len(body):
+        end = body.find(b"\n", start)
+        if end < 0:
+            end = len(body)
+        line = body[start:end].strip()
+        if len(line) > 0 and not line.startswith(b"#"):
+            break
+        start = end + 1
+
+    return start
+
+
+def enable_output_cache(cachedir=None, maxsize=4 * 1024**3):
+    """
+    Enable the on-disk cache for output files. Once enabled, the decoded data
+    of every output file that is read is stored as a .npy file in cachedir.
+    Reading the same output again memory-maps the stored data instead of
+    parsing the text. Entries are keyed by the absolute path, size and
+    modification time of the output file, so they are invalidated when the
+    output file changes. While the cache is enabled, the arrays returned for
+    output files are read-only, both when they are read from memory-mapped
+    entries and when the output is decoded to create the entry. Copy them
+    to modify them.
+
+    An entry always holds all fields of the complete grid, so reading only
+    some fields of an output that isn't cached yet decodes all of them to
+    create the entry. Reading a region of an output that isn't cached reads
+    only that region, like without the cache, and creates no entry. Regions
+    of cached outputs are taken from the entry.
+
+    cachedir:   directory to store the cache in. If None, use
+                $XDG_CACHE_HOME/mesh_hydro_utils, or
+                ~/.cache/mesh_hydro_utils if XDG_CACHE_HOME isn't set.
+    maxsize:    maximal size of the cache in bytes. When it is exceeded, the
+                least recently used entries are removed.
+
+    returns:
+        Nothing
+    """
+
+    if cachedir is None:
+        cachedir = os.environ.get("XDG_CACHE_HOME")
+        if cachedir is None:
+            cachedir = os.path.join(os.path.expanduser("~"), ".cache")
+        cachedir = os.path.join(cachedir, "mesh_hydro_utils")
+
+    os.makedirs(cachedir, exist_ok=True)
+
+    _output_cache["dir"] = cachedir
+    _output_cache["maxsize"] = maxsize
+
+    return
+
+
+def disable_output_cache():
+    """
+    Disable the on-disk cache for output files. The cache contents are kept.
+    """
+
+    _output_cache["dir"] = None
+
+    return
+
+
+def clear_output_cache(cachedir=None):
+    """
+    Remove all entries from the output cache directory. If cachedir is None,
+    clear the directory of the currently enabled cache.
+    """
+
+    if cachedir is None:
+        cachedir = _output_cache["dir"]
+    if cachedir is None or not os.path.isdir(cachedir):
+        return
+
+    for entry in os.scandir(cachedir):
+        if entry.name.endswith(".npy"):
+            _remove_if_exists(entry.path)
+
+    return
+
+
+def _output_cache_entry(fname, dtype):
+    """
+    Get the file name prefix of all cache entries for the output file fname,
+    the prefix of the entries for its current version, and the file name of
+    the cache entry for its current version decoded with the given dtype.
+    """
+
+    stat = os.stat(fname)
+    path = os.path.abspath(fname)
+    prefix = hashlib.sha1(path.encode()).hexdigest()
+    version = "{0}-{1:d}-{2:d}-".format(prefix, stat.st_size, stat.st_mtime_ns)
+    entry = version + np.dtype(dtype).name + ".npy"
+
+    return prefix, version, entry
+
+
+def _output_cache_load(fname, dtype):
+    """
+    Get the cached data of the output file fname decoded with the given
+    dtype as a read-only memory map, or None if there is no valid cache
+    entry.
+    """
+
+    prefix, version, entry = _output_cache_entry(fname, dtype)
+    path = os.path.join(_output_cache["dir"], entry)
+
+    try:
+        data = np.load(path, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+
+    # mark as recently used
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+    return data
+
+
+def _output_cache_store(fname, data):
+    """
+    Store the decoded data of the output file fname in the cache, replacing
+    entries of older versions of the same file. Entries for other dtypes of
+    the current version are kept. Then evict the least recently used entries
+    until the cache fits into its maximal size.
+    """
+
+    cachedir = _output_cache["dir"]
+    prefix, version, entry = _output_cache_entry(fname, data.dtype)
+
+    for old in os.scandir(cachedir):
+        if (
+            old.name.startswith(prefix)
+            and not old.name.startswith(version)
+            and old.name.endswith(".npy")
+        ):
+            _remove_if_exists(old.path)
+
+    if data.nbytes > _output_cache["maxsize"]:
+        return
+
+    # write to a temporary file first so that no one reads incomplete entries
+    tmpfile = os.path.join(cachedir, "{0}.{1:d}.tmp".format(entry, os.getpid()))
+    with open(tmpfile, "wb") as f:
+        np.save(f, data)
+    os.replace(tmpfile, os.path.join(cachedir, entry))
+
+    # other processes may be modifying the cache at the same time
+    entries = []
+    for e in os.scandir(cachedir):
+        if e.name.endswith(".npy"):
+            try:
+                entries.append((e.stat().st_mtime, e.stat().st_size, e.path))
+            except FileNotFoundError:
+                continue
+
+    entries.sort(reverse=True)
+    total = 0
+    for mtime, size, path in entries:
+        total += size
+        if total > _output_cache["maxsize"]:
+            _remove_if_exists(path)
+
+    return
+
+
+def _remove_if_exists(path):
+    """
+    Remove the file at path, unless someone else already did.
+    """
+
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+    return
+
+
+def _open_file(fname, mode):
+    """
+    Open the file fname, which may be compressed. When reading, the
+    compression format is detected from the first bytes of the file. When
+    writing, it is chosen by the extension of fname. Uncompressed files are
+    opened with the builtin open.
+
+    mode:   "r", "rb", "w", or "wb"
+
+    returns:
+        file object
+    """
+
+    if mode.startswith("r"):
+        with open(fname, "rb") as f:
+            magic = f.read(6)
+        compression = None
+        for name, signature in _COMPRESSION_MAGIC.items():
+            if magic.startswith(signature):
+                compression = name
+                break
+    else:
+        ext = os.path.splitext(fname)[1]
+        compression = _COMPRESSION_SUFFIXES.get(ext)
+
+    # compressed streams are binary by default
+    if not mode.endswith("b"):
+        mode = mode + "t"
+
+    if compression is None:
+        return open(fname, mode.replace("t", ""))
+    elif compression == "gzip":
+        # the default level 9 is much slower and hardly compresses better
+        return gzip.open(fname, mode, compresslevel=6)
+    elif compression == "bz2":
+        return bz2.open(fname, mode)
+    elif compression == "xz":
+        return lzma.open(fname, mode)
+    else:
+        zstd = _import_zstd()
+        if mode == "rb" and zstd.__name__ == "zstandard":
+            # the zstandard reader can neither read lines nor seek backwards,
+            # so decompress everything into memory
+            with zstd.open(fname, mode) as f:
+                return io.BytesIO(f.read())
+        return zstd.open(fname, mode)
+
+
+def _import_zstd():
+    """
+    Import a zstd module, which is an optional dependency, when it is needed.
+    Uses compression.zstd from the standard library (python >= 3.14) if
+    available, and the zstandard package otherwise.
+    """
+
+    try:
+        from compression import zstd
+    except ImportError:
+        try:
+            import zstandard as zstd
+        except ImportError:
+            raise ImportError(
+                "Couldn't import compression.zstd or zstandard, which is "
+                + "needed for zstd compressed files."
+            )
+
+    return zstd
+
+
+def _strip_compression_suffix(fname):
+    """
+    Remove the extension of a compressed file from fname, if there is one.
+    """
+
+    base, ext = os.path.splitext(fname)
+    if ext in _COMPRESSION_SUFFIXES:
+        return base
+    return fname
 
-    fname:  filename to be written
-    ndim:   number of dimensions
-    rho:    numpy array for density
-    u:      numpy array for velocity
-    p:      numpy array for pressure
+
+def write_hdf5(
+    fname, ndim, rho, u, p, t=0.0, step=0, dtype=float, compression=None, shuffle=False
+):
+    """
+    Write the given fields into an HDF5 file. The datasets are chunked, so
+    that regions of the grid can be read without reading the whole file.
+    Needs h5py.
+
+    The file contains the datasets density, velocity and pressure in the
+    group "data", and the attributes ndim, nx, time and step of the group
+    "metadata". The arrays are stored with the same shapes as they are
+    passed in. 2D arrays are indexed [j, i], with j along the y axis, as
+    read_output returns them.
+
+    fname:          filename to be written
+    ndim:           number of dimensions
+    rho:            numpy array for density
+    u:              numpy array for velocity
+    p:              numpy array for pressure
+    t:              time of the output
+    step:           current step of the simulation
+    dtype:          data type the fields are stored with
+    compression:    None, "gzip", or "lzf". See h5py.
+    shuffle:        whether to use the shuffle filter. Improves compression.
 
     returns:
         Nothing
     """
 
-    f = open(fname, "w")
+    h5py = _import_h5py()
+
     nx = rho.shape[0]
+    chunk = min(nx, _HDF5_CHUNK_CELLS[ndim])
+    chunks = (chunk,) * ndim
+
+    with h5py.File(fname, "w") as hfile:
+        data = hfile.create_group("data")
+        for name, values, vchunks in (
+            ("density", rho, chunks),
+            ("velocity", u, chunks + (2,) * (ndim - 1)),
+            ("pressure", p, chunks),
+        ):
+            data.create_dataset(
+                name,
+                data=values,
+                dtype=dtype,
+                chunks=vchunks,
+                compression=compression,
+                shuffle=shuffle,
+            )
 
-    f.write("filetype = arbitrary\n")
-    f.write("ndim = {0:d}\n".format(ndim))
-    f.write("nx = {0:d}\n".format(nx))
-    f.write("\n")
+        metadata = hfile.create_group("metadata")
+        metadata.attrs["ndim"] = ndim
+        metadata.attrs["nx"] = nx
+        metadata.attrs["time"] = t
+        metadata.attrs["step"] = step
 
-    if ndim == 1:
-        for i in range(nx):
-            f.write("{0:12.6f} {1:12.6f} {2:12.6f}\n".format(rho[i], u[i], p[i]))
+    return
 
-    elif ndim == 2:
-        for j in range(nx):
-            for i in range(nx):
-                f.write(
-                    "{0:12.6f} {1:12.6f} {2:12.6f} {3:12.6f}\n".format(
-                        rho[i, j], u[i, j, 0], u[i, j, 1], p[i, j]
-                    )
-                )
 
-    return
+def _import_h5py():
+    """
+    Import h5py, which is an optional dependency, when it is needed.
+    """
+
+    try:
+        import h5py
+    except ImportError:
+        raise ImportError(
+            "Couldn't import h5py, which is needed for HDF5 files. "
+            + "Did you install with the hdf5 option enabled?"
+        )
+
+    return h5py
+
+
+def _is_hdf5(fname):
+    """
+    Check whether the file fname is an HDF5 file.
+    """
+
+    with open(fname, "rb") as f:
+        return f.read(len(_HDF5_SIGNATURE)) == _HDF5_SIGNATURE
 
 
-def read_output(fname):
+def _read_hdf5_header(fname):
     """
-    Read the given output file.
+    Read the metadata of an HDF5 output or IC file. Files without time and
+    step, e.g. ICs, have t = 0 and step = 0.
+
     returns:
         ndim:       integer of how many dimensions we have
-        rho:        numpy array for density
-        u:          numpy array for velocity. In 1D: is 1D array. In 2D: is 2D array containing
-                    both ux and uy
-        p:          numpy array for pressure
+        nx:         number of cells per dimension
         t:          time of the output
         step:       current step of the simulation
     """
 
-    check_file_exists(fname)
+    h5py = _import_h5py()
 
-    f = open(fname)
+    with h5py.File(fname, "r") as hfile:
+        if "time" in hfile["metadata"]:
+            raise ValueError(
+                "'{0}' contains a whole run. Use read_hdf5_run instead.".format(fname)
+            )
+        attrs = hfile["metadata"].attrs
+        ndim = int(attrs["ndim"])
+        # older converted files don't store nx
+        nx = int(hfile["data/density"].shape[0])
+        t = float(attrs.get("time", 0.0))
+        step = int(attrs.get("step", 0))
 
-    nx = None
-    ndim = None
-    t = None
-    step = None
+    return ndim, nx, t, step
 
-    linecount = 0
-    while True:
-        # safety measure
-        linecount += 1
-        if linecount > 1000:
-            print(
-                "================ Got to linecount = 1000 without having found all metadata. Wtf? Exiting now."
-            )
-            print("got nx:", nx)
-            print("got ndim", ndim)
-            print("got t:", t)
-            print("got step:", step)
-            quit(1)
 
-        line = f.readline()
-        clean = _remove_python_style_comments(line)
-        if _line_is_empty(clean):
-            continue
+def _read_hdf5_fields(fname, fields, region=None, index=None, dtype=float):
+    """
+    Read the given fields of an HDF5 file, or only the part of them within
+    region. See read_output for the parameters. For files containing a
+    whole run, index selects the output. The fields are converted to dtype
+    while they are read.
+
+    returns:
+        data:   dict containing a numpy array for every field in fields
+    """
 
+    h5py = _import_h5py()
+    names = {"rho": "density", "u": "velocity", "p": "pressure"}
+
+    with h5py.File(fname, "r") as hfile:
+        ndim = int(hfile["metadata"].attrs["ndim"])
+        nx = int(hfile["data/density"].shape[-1])
+
+        if region is None:
+            selection = ()
         else:
-            if clean.strip().startswith("x"):  # header name descriptions
-                continue
-            name, eq, value = clean.partition("=")
-            nstr = name.strip()
-            if nstr == "nx":
-                nx = int(value)
-            elif nstr == "ndim":
-                ndim = int(value)
-            elif nstr == "t":
-                t = float(value)
-            elif nstr == "nsteps":
-                step = int(value)
+            i0, i1, j0, j1, shape = _get_region_bounds(ndim, nx, region)
+            if ndim == 1:
+                selection = (slice(i0, i1),)
             else:
-                raise ValueError("Unknown name: '{0}'".format(name))
+                selection = (slice(j0, j1), slice(i0, i1))
+        if index is not None:
+            selection = (index,) + selection
 
-        if nx is not None and ndim is not None and t is not None and step is not None:
-            break
+        result = {}
+        for field in fields:
+            dset = hfile["data"][names[field]]
+            result[field] = dset.astype(dtype)[selection]
 
-    f.close()
+    return result
 
-    if ndim == 1:
-        rho, u, p = np.loadtxt(
-            fname, usecols=[1, 2, 3], dtype=float, unpack=True, skiprows=linecount
-        )
 
-    elif ndim == 2:
-        rho, ux, uy, p = np.loadtxt(
-            fname, usecols=[2, 3, 4, 5], dtype=float, unpack=True, skiprows=linecount
+def _read_hdf5_blocks(fname, max_bytes, fields, dtype):
+    """
+    Read an HDF5 file in blocks of contiguous rows. See read_output_blocks.
+    """
+
+    ndim, nx, t, step = _read_hdf5_header(fname)
+
+    cells_per_row = 1 if ndim == 1 else nx
+    # rho, two velocity components, p
+    bytes_per_row = cells_per_row * dtype.itemsize * 4
+    rows_per_block = max(1, max_bytes // bytes_per_row)
+
+    for j0 in range(0, nx, rows_per_block):
+        j1 = min(j0 + rows_per_block, nx)
+        if ndim == 1:
+            region = (j0, j1)
+        else:
+            region = (0, nx, j0, j1)
+        block = _read_hdf5_fields(fname, fields, region, dtype=dtype)
+        yield j0, j1, block.get("rho"), block.get("u"), block.get("p")
+
+    return
+
+
+def convert_outputs_to_hdf5(
+    filelist,
+    outfile,
+    append=False,
+    workers=None,
+    dtype=float,
+    compression=None,
+    shuffle=False,
+):
+    """
+    Convert all outputs of a run into a single HDF5 file, with the time as
+    first axis of every field. The outputs are read in parallel with
+    read_outputs, and written one after the other as they arrive. Needs
+    h5py.
+
+    The file contains the datasets density, velocity and pressure of shape
+    (nt, nx) or (nt, nx, nx) in the group "data", and the datasets time and
+    step of shape (nt,) as well as the attributes ndim and nx in the group
+    "metadata". Every output is stored in its own chunks along the time axis.
+
+    filelist:       list of output file names, in the order they should be
+                    stored. All outputs need to have the same ndim and nx.
+    outfile:        name of the HDF5 file to write
+    append:         if True and outfile exists, only add the outputs with a
+                    step larger than the last step stored in outfile, which
+                    must have been written by this function.
+                    Otherwise, outfile is overwritten.
+    workers:        number of worker processes. See read_outputs.
+    dtype:          data type the fields are stored with
+    compression:    None, "gzip", or "lzf". See h5py.
+    shuffle:        whether to use the shuffle filter. Improves compression.
+
+    returns:
+        number of outputs written
+    """
+
+    h5py = _import_h5py()
+
+    if len(filelist) == 0:
+        raise ValueError("Need at least one output file to convert")
+
+    headers = read_output_headers(filelist)
+    ndim, nx = headers[0][:2]
+
+    mode = "w"
+    if append and os.path.exists(outfile):
+        mode = "a"
+
+    with h5py.File(outfile, mode) as hfile:
+        if mode == "w":
+            _create_hdf5_run(hfile, ndim, nx, dtype, compression, shuffle)
+        elif "metadata" not in hfile or "time" not in hfile["metadata"]:
+            raise ValueError(
+                "Can't append to '{0}', it doesn't contain a whole run.".format(outfile)
+            )
+
+        metadata = hfile["metadata"]
+        if (int(metadata.attrs["ndim"]), int(metadata.attrs["nx"])) != (ndim, nx):
+            raise ValueError(
+                "'{0}' has ndim={1:d}, nx={2:d}, outputs have ndim={3:d}, nx={4:d}".format(
+                    outfile,
+                    int(metadata.attrs["ndim"]),
+                    int(metadata.attrs["nx"]),
+                    ndim,
+                    nx,
+                )
+            )
+
+        # the steps are written last for every output, so they tell how many
+        # outputs have been stored completely
+        nt = metadata["step"].shape[0]
+        last = None
+        if nt > 0:
+            last = int(metadata["step"][nt - 1])
+
+        newfiles = []
+        for fname, header in zip(filelist, headers):
+            if header[:2] != (ndim, nx):
+                raise ValueError(
+                    "Output {0} has ndim={1:d}, nx={2:d}, expected ndim={3:d}, nx={4:d}".format(
+                        fname, header[0], header[1], ndim, nx
+                    )
+                )
+            if last is None or header[3] > last:
+                newfiles.append(fname)
+
+        data = hfile["data"]
+        datasets = (data["density"], data["velocity"], data["pressure"])
+        for dset in datasets + (metadata["time"],):
+            dset.resize(nt, axis=0)
+
+        for ndim_out, rho, u, p, t, step in read_outputs(
+            newfiles, workers=workers, dtype=dtype
+        ):
+            for dset, values in zip(datasets, (rho, u, p)):
+                dset.resize(nt + 1, axis=0)
+                dset[nt] = values
+            metadata["time"].resize(nt + 1, axis=0)
+            metadata["time"][nt] = t
+            metadata["step"].resize(nt + 1, axis=0)
+            metadata["step"][nt] = step
+            nt += 1
+
+    return len(newfiles)
+
+
+def _create_hdf5_run(hfile, ndim, nx, dtype, compression, shuffle):
+    """
+    Create the empty, resizable datasets of an HDF5 file containing a whole
+    run in the open h5py file hfile. See convert_outputs_to_hdf5.
+    """
+
+    chunk = min(nx, _HDF5_CHUNK_CELLS[ndim])
+    chunks = (1,) + (chunk,) * ndim
+    shape = (0,) + (nx,) * ndim
+
+    data = hfile.create_group("data")
+    for name, extra in (
+        ("density", ()),
+        ("velocity", (2,) * (ndim - 1)),
+        ("pressure", ()),
+    ):
+        data.create_dataset(
+            name,
+            shape=shape + extra,
+            maxshape=(None,) + shape[1:] + extra,
+            dtype=dtype,
+            chunks=chunks + extra,
+            compression=compression,
+            shuffle=shuffle,
         )
 
-        rho = rho.reshape((nx, nx))
-        p = p.reshape((nx, nx))
-        ux = ux.reshape((nx, nx))
-        uy = uy.reshape((nx, nx))
-        u = np.stack((ux, uy), axis=2)
+    metadata = hfile.create_group("metadata")
+    metadata.attrs["ndim"] = ndim
+    metadata.attrs["nx"] = nx
+    metadata.create_dataset("time", shape=(0,), maxshape=(None,), dtype=float)
+    metadata.create_dataset("step", shape=(0,), maxshape=(None,), dtype=np.int64)
+
+    return
+
+
+def read_hdf5_run_header(fname):
+    """
+    Read the metadata of an HDF5 file containing a whole run, written by
+    convert_outputs_to_hdf5.
+
+    returns:
+        ndim:       integer of how many dimensions we have
+        nx:         number of cells per dimension
+        times:      numpy array of the times of the outputs
+        steps:      numpy array of the steps of the outputs
+    """
+
+    h5py = _import_h5py()
+    check_file_exists(fname)
+
+    with h5py.File(fname, "r") as hfile:
+        metadata = hfile["metadata"]
+        ndim = int(metadata.attrs["ndim"])
+        nx = int(metadata.attrs["nx"])
+        steps = metadata["step"][:]
+        times = metadata["time"][: steps.shape[0]]
+
+    return ndim, nx, times, steps
+
+
+def read_hdf5_run(fname, index, region=None, fields=None, dtype=float):
+    """
+    Read a single output from an HDF5 file containing a whole run, written
+    by convert_outputs_to_hdf5.
+
+    fname:      filename to be read
+    index:      index of the output along the time axis
+    region:     passed on to read_output
+    fields:     passed on to read_output
+    dtype:      passed on to read_output
+
+    returns:
+        the tuple (ndim, rho, u, p, t, step), as returned by read_output
+    """
+
+    fields = _check_output_fields(fields)
+    ndim, nx, times, steps = read_hdf5_run_header(fname)
+    index = range(steps.shape[0])[index]
 
-    return ndim, rho, u, p, t, step
+    data = _read_hdf5_fields(fname, fields, region, index, dtype)
 
+    return (
+        ndim,
+        data.get("rho"),
+        data.get("u"),
+        data.get("p"),
+        float(times[index]),
+        int(steps[index]),
+    )
 
-def read_ic(fname, nx=100):
+
+def read_ic(fname, nx=100, dtype=float):
     """
     Top-level function to read in the given IC file. File is passed as string fname.
     It figures out the dimensions etc by itself. Returns the relevant data as numpy
     arrays, which can be either 1D or 2D, depending on IC.
 
     If the file type is two-state type, it will generate a 1D numpy array with nx cells.
+    HDF5 files written by write_ic or write_hdf5 are read as arbitrary type ICs.
+    The arrays have the data type dtype.
 
     returns:
         ndim:       integer of how many dimensions we have
@@ -147,120 +2089,132 @@ def read_ic(fname, nx=100):
     """
 
     check_file_exists(fname)
+
+    if _is_hdf5(fname):
+        ndim, nx, t, step = _read_hdf5_header(fname)
+        data = _read_hdf5_fields(fname, ("rho", "u", "p"), dtype=dtype)
+        return ndim, False, data["rho"], data["u"], data["p"]
+
     twostate = _get_ic_filetype(fname)
 
     if twostate:
         ndim = 1
-        rho, u, p = _read_twostate_ic(fname, nx)
+        rho, u, p = _read_twostate_ic(fname, nx, dtype)
 
     else:
-        ndim, rho, u, p = _read_arbitrary_ic(fname)
+        ndim, rho, u, p = _read_arbitrary_ic(fname, dtype)
 
     return ndim, twostate, rho, u, p
 
 
-def _read_arbitrary_ic(fname):
+def _read_arbitrary_ic(fname, dtype=float):
     """
     read the complete arbitrary format IC file
     """
 
-    f = open(fname)
-    data = f.readlines()
-    f.close()
+    f = _open_file(fname, "r")
 
     got_ftype = False
     got_nx = False
     got_ndim = False
     got_header = False
 
-    i = 0
-    j = 0
+    # parse the header line by line
+    while not got_header:
+        line = f.readline()
+        if line == "":
+            print("Reached end of file before finding the complete header.")
+            print("got filetype:", got_ftype, "got ndim:", got_ndim, "got nx:", got_nx)
+            quit(1)
 
-    for line in data:
         clean = _remove_C_style_comments(line)
         clean = _remove_newline(clean)
         if _line_is_empty(clean):
             continue
 
-        if not got_header:
-            name, eq, value = clean.partition("=")
-            name = name.strip()
-            if name == "filetype":
-                got_ftype = True
-                continue
-            elif name == "ndim":
-                ndim = int(value)
-                got_ndim = True
-            elif name == "nx":
-                nx = int(value)
-                got_nx = True
-            else:
-                print("Unrecognized value name:", name)
-
-            got_header = got_ftype and got_nx and got_ndim
-            if got_header:
-                if ndim == 1:
-                    rho = np.empty((nx), dtype=float)
-                    u = np.empty((nx), dtype=float)
-                    p = np.empty((nx), dtype=float)
-
-                elif ndim == 2:
-                    rho = np.empty((nx, nx), dtype=float)
-                    u = np.empty((nx, nx, 2), dtype=float)
-                    p = np.empty((nx, nx), dtype=float)
-
+        name, eq, value = clean.partition("=")
+        name = name.strip()
+        if name == "filetype":
+            got_ftype = True
+        elif name == "ndim":
+            ndim = int(value)
+            got_ndim = True
+        elif name == "nx":
+            nx = int(value)
+            got_nx = True
         else:
-            vals = _split_columns(clean)
+            print("Unrecognized value name:", name)
 
-            if ndim == 1:
-                if len(vals) != 3:
-                    print("Got wrong number of values in the line.")
-                    print("Line was: ", line, end="")
-                    print("Cleaned line is: '{0}'".format(clean))
-                    print("I expect 3 values")
-                    print("I got:", len(vals), vals)
-                    quit(1)
-
-                rho[i] = float(vals[0])
-                u[i] = float(vals[1])
-                p[i] = float(vals[2])
-                i += 1
-
-            elif ndim == 2:
-                if len(vals) != 4:
-                    print("Got wrong number of values in the line.")
-                    print("Line was: ", line, end="")
-                    print("Cleaned line is: '{0}'".format(clean))
-                    print("I expect 4 values")
-                    print("I got:", len(vals), vals)
-                    quit(1)
-
-                rho[j, i] = float(vals[0])
-                u[j, i, 0] = float(vals[1])
-                u[j, i, 1] = float(vals[2])
-                p[j, i] = float(vals[3])
-                i += 1
-                if i == nx:
-                    i = 0
-                    j += 1
+        got_header = got_ftype and got_nx and got_ndim
+
+    if ndim == 1:
+        ncols = 3
+        nrows = nx
+    elif ndim == 2:
+        ncols = 4
+        nrows = nx * nx
+    else:
+        raise ValueError("Unknown ndim '{0}'".format(ndim))
+
+    # now hand the rest of the file over to the numpy parser in one go.
+    # Everything after a slash is a comment, same as in
+    # _remove_C_style_comments.
+    try:
+        data = np.loadtxt(f, comments="/", dtype=float, ndmin=2)
+    except ValueError as err:
+        print("Got wrong number of values in a line.")
+        print("I expect", ncols, "values")
+        print("Error was:", err)
+        quit(1)
+    finally:
+        f.close()
+
+    if data.shape[0] > 0 and data.shape[1] != ncols:
+        print("Got wrong number of values in the lines.")
+        print("I expect", ncols, "values")
+        print("I got:", data.shape[1])
+        quit(1)
 
     # checks
     if ndim == 1:
-        if i != nx:
-            print("Got too few values in x direction. Got i=", i, "should be", nx)
-            quit(1)
-    if ndim == 2:
-        if j != nx:
-            print("Got too few values in y direction. Got i=", j, "should be", nx)
+        if data.shape[0] != nrows:
+            print(
+                "Got wrong number of values in x direction. Got i=",
+                data.shape[0],
+                "should be",
+                nx,
+            )
             quit(1)
-        if i != 0:
-            print("Got too few values in y direction. Got i=", i, "should be", 0)
+
+        # views into data, unless a different dtype is requested
+        rho = data[:, 0].astype(dtype, copy=False)
+        u = data[:, 1].astype(dtype, copy=False)
+        p = data[:, 2].astype(dtype, copy=False)
+
+    elif ndim == 2:
+        if data.shape[0] != nrows:
+            j, i = divmod(data.shape[0], nx)
+            print(
+                "Got wrong number of values. Got j=",
+                j,
+                "i=",
+                i,
+                "should be",
+                nx,
+                "and",
+                0,
+            )
             quit(1)
 
+        # line j * nx + i contains cell [j, i]
+        rho = data[:, 0].reshape((nx, nx)).astype(dtype, copy=False)
+        u = data[:, 1:3].reshape((nx, nx, 2)).astype(dtype, copy=False)
+        p = data[:, 3].reshape((nx, nx)).astype(dtype, copy=False)
+
     return ndim, rho, u, p
 
 
-def _read_twostate_ic(fname, nx):
+def _read_twostate_ic(fname, nx, dtype=float):
     """
     Read complete two-state format style.
     Return rho, u, p arrays with nx elements.
@@ -273,7 +2227,7 @@ def _read_twostate_ic(fname, nx):
     uR = None
     pR = None
 
-    f = open(fname)
+    f = _open_file(fname, "r")
     data = f.readlines()
     f.close()
 
@@ -315,9 +2269,9 @@ def _read_twostate_ic(fname, nx):
 
     # now allocate rho, u, p arrays
 
-    rho = np.empty((nx), dtype=float)
-    u = np.empty((nx), dtype=float)
-    p = np.empty((nx), dtype=float)
+    rho = np.empty((nx), dtype=dtype)
+    u = np.empty((nx), dtype=dtype)
+    p = np.empty((nx), dtype=dtype)
 
     nxhalf = nx // 2
     rho[:nxhalf] = rhoL
@@ -335,7 +2289,7 @@ def _get_ic_filetype(fname):
     Get the filetype of the IC file. Returns True if two-state style file, False if arbitrary.
     """
 
-    f = open(fname)
+    f = _open_file(fname, "r")
 
     linecount = 0
     while True:
@@ -431,54 +2385,3 @@ def _remove_newline(line):
             return (line[:-1]).strip()
 
     return line
-
-
-def _split_columns(line, delim=" "):
-    """
-    Split given line (string) into columns defined by the delimiter delim.
-    If the delimiter occurs multiple times back - to - back, treat it as
-    only one column delimiter.
-
-    returns:
-        splits: List of strings, representing columns
-
-    """
-
-    splits = []
-
-    start = 0
-    stop = 0
-
-    while stop < len(line) and start < len(line):
-        if line[start] == delim:
-            start += 1
-            continue
-
-        if line[stop] != delim:
-            if line[stop] == "\n" or line[stop] == "\r":
-                # add value without newline
-                splits.append(line[start:stop])
-                start = stop
-                break
-            else:
-                stop += 1
-                continue
-
-        else:  # if line[stop] == delim
-            splits.append(line[start:stop])
-            while stop < len(line):
-                if line[stop] == delim:
-                    stop += 1
-                else:
-                    if line[stop] == "\n" or line[stop] == "\r":
-                        # add value without newline
-                        splits.append(line[start:stop])
-                        start = stop
-                    break
-            start = stop
-
-    # add final column
-    if start != stop:
-        splits.append(line[start:])
-
-    return splits
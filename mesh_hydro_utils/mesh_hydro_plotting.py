@@ -16,6 +16,8 @@ from mpl_toolkits.mplot3d import Axes3D
 import numpy as np
 import shutil
 
+from .mesh_hydro_io import _strip_compression_suffix
+
 usetex = shutil.which("tex") is not None
 
 # Plot parameters
@@ -401,7 +403,8 @@ def plot_savefig(fig, fname=None, case=None, fname_force=None):
 def plot_get_figname(fname, case=None):
     """
     Generate figure name using initial filename fname.
-    Remove the file suffix, if present, and add a png.
+    Remove the file suffix, if present, and add a png. The suffix of
+    compressed files is removed as well, e.g. from "output-0001.out.gz".
 
     if case is not None, it will add something to the file name
     so it will be distinguishable.
@@ -414,6 +417,8 @@ def plot_get_figname(fname, case=None):
         figname:    figure name string
     """
 
+    fname = _strip_compression_suffix(fname)
+
     # start from last letter, look for a dot to find the suffix
     # if you reach a slash first, stop there
     nchars = len(fname)
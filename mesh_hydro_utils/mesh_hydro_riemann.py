@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 
 # ------------------------------------------------------------------------------------------------
-# An exact Riemann solver and solution sampler.
+# An exact Riemann solver and solution sampler, and the two-rarefaction
+# approximation to it.
 #
 # For documentation on what is being computed, please refer to the documentation
 # provided in the mesh-hydro code (https://github.com/mladenivkovic/mesh-hydro)
@@ -13,390 +14,786 @@
 import numpy as np
 
 
+# default adiabatic index and convergence criterion
 gamma = 5.0 / 3.0
-
-GP1 = gamma + 1
-GM1 = gamma - 1
-GP1OGM1 = GP1 / GM1
-GM1OGP1 = 1 / GP1OGM1
-GM1HALF = 0.5 * GM1
-alpha = GM1HALF / gamma
-
 epsilon = 1e-6
 
 
-def riemann_solver(rho, u, p, t):
+class RiemannSolver:
+    """
+    Riemann solver for ideal gases with a given adiabatic index, and the
+    geometry of the problems solved with solve(). Instances are immutable,
+    so they can be shared between threads, and they can be pickled to be
+    sent to worker processes.
+
+    gamma:      adiabatic index
+    xmin, xmax: lower and upper bounds of the box
+    x0:         position of the initial discontinuity. If None, the
+                discontinuity is at the lower interface of cell nx // 2,
+                like in two-state ICs.
+    epsilon:    convergence criterion of the iteration for the star states
+
+    attributes:
+        gamma, xmin, xmax, x0, epsilon:
+                    the parameters above
+        GP1:        gamma + 1
+        GM1:        gamma - 1
+        GP1OGM1:    (gamma + 1) / (gamma - 1)
+        GM1OGP1:    (gamma - 1) / (gamma + 1)
+        GM1HALF:    (gamma - 1) / 2
+        alpha:      (gamma - 1) / (2 gamma)
     """
-    Solve the riemann problem for ideal gases
-    and sample the solution at time t.
-    Assumes box size is = 1,
-    and that the left and right state are separated
-    at index nx/2, where nx = rho.shape[0]
 
-    rho, u, p are assumed to be numpy arrays of floats
-    containing density, velocity, and pressure of the gas
+    __slots__ = (
+        "gamma",
+        "xmin",
+        "xmax",
+        "x0",
+        "epsilon",
+        "GP1",
+        "GM1",
+        "GP1OGM1",
+        "GM1OGP1",
+        "GM1HALF",
+        "alpha",
+    )
+
+    def __init__(self, gamma=gamma, xmin=0.0, xmax=1.0, x0=None, epsilon=epsilon):
+        if gamma <= 1:
+            raise ValueError("Need gamma > 1, got {0}".format(gamma))
+        if xmax <= xmin:
+            raise ValueError("Need xmax > xmin, got [{0}, {1}]".format(xmin, xmax))
+        if x0 is not None and (x0 <= xmin or x0 >= xmax):
+            raise ValueError(
+                "Discontinuity x0 = {0} is outside of the box [{1}, {2}]".format(
+                    x0, xmin, xmax
+                )
+            )
 
-    returns arrays of equal shapes with the sampled solution
-    for density, velocity and pressure at time t
-    """
+        GP1 = gamma + 1
+        GM1 = gamma - 1
+        GP1OGM1 = GP1 / GM1
+        GM1HALF = 0.5 * GM1
+
+        values = {
+            "gamma": gamma,
+            "xmin": xmin,
+            "xmax": xmax,
+            "x0": x0,
+            "epsilon": epsilon,
+            "GP1": GP1,
+            "GM1": GM1,
+            "GP1OGM1": GP1OGM1,
+            "GM1OGP1": 1 / GP1OGM1,
+            "GM1HALF": GM1HALF,
+            "alpha": GM1HALF / gamma,
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("RiemannSolver is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("RiemannSolver is immutable")
+
+    def __reduce__(self):
+        return (
+            RiemannSolver,
+            (self.gamma, self.xmin, self.xmax, self.x0, self.epsilon),
+        )
 
-    if t == 0:
-        return rho, u, p
+    def __eq__(self, other):
+        if not isinstance(other, RiemannSolver):
+            return NotImplemented
+        return self.__reduce__()[1] == other.__reduce__()[1]
+
+    def __hash__(self):
+        return hash(self.__reduce__()[1])
+
+    def __repr__(self):
+        return (
+            "RiemannSolver(gamma={0:g}, xmin={1:g}, xmax={2:g}, x0={3}, "
+            "epsilon={4:g})"
+        ).format(self.gamma, self.xmin, self.xmax, self.x0, self.epsilon)
+
+    def solve(self, rho, u, p, t):
+        """
+        Solve the riemann problem for ideal gases
+        and sample the solution at time t.
+        The cells are assumed to cover the box [xmin, xmax]
+        uniformly, and the left and right state are taken from
+        the cells left and right of the discontinuity at x0
+
+        rho, u, p are assumed to be numpy arrays of floats
+        containing density, velocity, and pressure of the gas
+
+        returns arrays of equal shapes with the sampled solution
+        for density, velocity and pressure at time t
+        """
+
+        if t == 0:
+            return rho, u, p
+
+        nx = rho.shape[0]
+        dx = (self.xmax - self.xmin) / nx
+        if self.x0 is None:
+            # in hydro_io.py/read_twostate_ic: rho[:nxhalf] = rhoL, nxhalf = nx // 2
+            i = nx // 2 - 1
+            center = self.xmin + (nx // 2) * dx  # position of the center
+        else:
+            center = self.x0
+            # last cell with its center left of the discontinuity
+            i = int(np.ceil((center - self.xmin) / dx - 0.5)) - 1
+
+        if i < 0 or i + 1 >= nx:
+            raise ValueError(
+                "Need cells on both sides of the discontinuity, got nx = {0:d}".format(
+                    nx
+                )
+            )
 
-    nx = rho.shape[0]
-    dx = 1.0 / nx
-    # in hydro_io.py/read_twostate_ic: rho[:nxhalf] = rhoL, nxhalf = nx // 2
-    i = nx // 2 - 1
-
-    rhoL = rho[i]
-    rhoR = rho[i + 1]
-    uL = u[i]
-    uR = u[i + 1]
-    pL = p[i]
-    pR = p[i + 1]
-
-    print("Solving Riemann problem with")
-    print("rhoL = {0:12.6f}, rhoR = {1:12.6f}".format(rhoL, rhoR))
-    print("  uL = {0:12.6f},   uR = {1:12.6f}".format(uL, uR))
-    print("  pL = {0:12.6f},   pR = {1:12.6f}".format(pL, pR))
-    print("  nx = ", nx)
-    print("   t = ", t)
-
-    # check if we have vacuum
-    is_vacuum = False
-    if rhoL == 0:
-        is_vacuum = True
-    elif rhoR == 0:
-        is_vacuum = True
-    else:
-        # don't compute square roots of zero, so compute
-        # soundspeeds only now
-        aL = _soundspeed(pL, rhoL)
-        aR = _soundspeed(pR, rhoR)
-        if uR - uL >= 2 / GM1 * (aL + aR):
+        rhoL = rho[i]
+        rhoR = rho[i + 1]
+        uL = u[i]
+        uR = u[i + 1]
+        pL = p[i]
+        pR = p[i + 1]
+
+        print("Solving Riemann problem with")
+        print("rhoL = {0:12.6f}, rhoR = {1:12.6f}".format(rhoL, rhoR))
+        print("  uL = {0:12.6f},   uR = {1:12.6f}".format(uL, uR))
+        print("  pL = {0:12.6f},   pR = {1:12.6f}".format(pL, pR))
+        print("  nx = ", nx)
+        print("   t = ", t)
+
+        # check if we have vacuum
+        is_vacuum = False
+        if rhoL == 0:
             is_vacuum = True
+        elif rhoR == 0:
+            is_vacuum = True
+        else:
+            # don't compute square roots of zero, so compute
+            # soundspeeds only now
+            aL = self._soundspeed(pL, rhoL)
+            aR = self._soundspeed(pR, rhoR)
+            if uR - uL >= 2 / self.GM1 * (aL + aR):
+                is_vacuum = True
 
-    if not is_vacuum:
-        pstar, ustar = _find_star_state(rhoL, uL, pL, rhoR, uR, pR)
-
-    rho_sol = np.empty(rho.shape, dtype=float)
-    u_sol = np.empty(u.shape, dtype=float)
-    p_sol = np.empty(p.shape, dtype=float)
+        if not is_vacuum:
+            pstar, ustar = self._find_star_state(rhoL, uL, pL, rhoR, uR, pR)
 
-    center = (nx // 2) * dx  # position of the center
-    for i in range(nx):
-        x = (i + 0.5) * dx - center
+        x = self.xmin + (np.arange(nx) + 0.5) * dx - center
         xt = x / t
+
         if not is_vacuum:
-            rho_sol[i], u_sol[i], p_sol[i] = _sample_solution(
+            rho_sol, u_sol, p_sol = self._sample_solution(
                 rhoL, rhoR, uL, uR, ustar, pL, pR, pstar, xt
             )
         else:
-            rho_sol[i], u_sol[i], p_sol[i] = _sample_vacuum_solution(
+            rho_sol, u_sol, p_sol = self._sample_vacuum_solution(
                 rhoL, rhoR, uL, uR, pL, pR, xt
             )
 
-    return rho_sol, u_sol, p_sol
+        return rho_sol, u_sol, p_sol
+
+    def find_star_states(self, rhoL, uL, pL, rhoR, uR, pR, maxiter=1000):
+        """
+        Find the star state pressures and velocities of many Riemann problems at
+        once, following Toro 1999. The Newton iteration runs on all problems
+        together; problems drop out of it as soon as they have converged.
+
+        (See section 4.2.5 in mesh-hydro/tex/equations/equations_and_implementation_details.pdf)
+
+        rhoL, uL, pL:   density, velocity, pressure of the left states
+        rhoR, uR, pR:   density, velocity, pressure of the right states
+        maxiter:        maximal number of iterations per problem
+
+        All states may be numpy arrays or scalars, which are broadcast against
+        each other.
+
+        returns:
+            pstar:  numpy array of star state pressures. Is 0 for problems with
+                    vacuum.
+            ustar:  numpy array of star state velocities. For problems with
+                    vacuum, the velocity of the vacuum front or, if vacuum is
+                    generated, of the middle of the vacuum region.
+            niter:  numpy array of the number of iterations per problem. Is 0
+                    for problems with vacuum.
+        """
+
+        rhoL, uL, pL, rhoR, uR, pR = _broadcast_states(rhoL, uL, pL, rhoR, uR, pR)
+
+        pstar = np.zeros(rhoL.shape, dtype=float)
+        niter = np.zeros(rhoL.shape, dtype=int)
+        vacuum, ustar, aL, aR = self._vacuum_star_states(rhoL, uL, pL, rhoR, uR, pR)
+
+        # solve all other problems
+        solve = ~vacuum
+        rl = rhoL[solve]
+        ul = uL[solve]
+        pl = pL[solve]
+        rr = rhoR[solve]
+        ur = uR[solve]
+        pr = pR[solve]
+        al = aL[solve]
+        ar = aR[solve]
+        AL = self._A_K(rl)
+        AR = self._A_K(rr)
+        BL = self._B_K(pl)
+        BR = self._B_K(pr)
+
+        # find initial guess for pstar.
+        # use Two Rarefaction Approximation
+        ppv = 0.5 * (pl + pr) - 0.125 * (ur - ul) * (rl + rr) * (al + ar)
+        ps = np.maximum(self.epsilon, ppv)
+        its = np.zeros(ps.shape, dtype=int)
+
+        # the problems that haven't converged yet: their indices into the solved
+        # problems, and their parameters, compacted as problems drop out
+        active = np.arange(ps.shape[0])
+        params = np.stack((rl, pl, AL, BL, al, rr, pr, AR, BR, ar, ur - ul))
+        p = ps.copy()
+        while active.shape[0] > 0:
+            rl_, pl_, AL_, BL_, al_, rr_, pr_, AR_, BR_, ar_, du = params
+            f = self._f_K(p, pl_, AL_, BL_, al_) + self._f_K(p, pr_, AR_, BR_, ar_) + du
+            dfdp = self._df_Kdp(p, rl_, pl_, AL_, BL_, al_)
+            dfdp += self._df_Kdp(p, rr_, pr_, AR_, BR_, ar_)
+            p_new = p - f / dfdp
+            diff = 2 * np.abs(p_new - p) / np.abs(p_new + p)
+
+            # f is monotonically increasing in p, so if the iteration tries to go
+            # below epsilon from epsilon, the root is below it: stop there.
+            floor = (p == self.epsilon) & (p_new <= self.epsilon)
+
+            # don't allow negative pressure
+            p = np.maximum(p_new, self.epsilon)
+            ps[active] = p
+            its[active] += 1
+
+            keep = (diff > self.epsilon) & ~floor & (its[active] <= maxiter)
+            active = active[keep]
+            params = params[:, keep]
+            p = p[keep]
+
+        if np.any(its > maxiter):
+            print(
+                "Got",
+                maxiter,
+                "iterations for exact riemann solver in",
+                np.count_nonzero(its > maxiter),
+                "problems",
+            )
 
+        pstar[solve] = ps
+        ustar[solve] = ul - self._f_K(ps, pl, AL, BL, al)
+        niter[solve] = its
+
+        return pstar, ustar, niter
+
+    def two_rarefaction_star_states(self, rhoL, uL, pL, rhoR, uR, pR):
+        """
+        Approximate the star state pressures and velocities of many Riemann
+        problems at once with the two-rarefaction Riemann solver (TRRS), i.e.
+        assuming that both non-linear waves are rarefactions. This is exact if
+        they are, and needs no iteration.
+        (See Toro 1999, section 9.4.1)
+
+        rhoL, uL, pL:   density, velocity, pressure of the left states
+        rhoR, uR, pR:   density, velocity, pressure of the right states
+
+        All states may be numpy arrays or scalars, which are broadcast against
+        each other.
+
+        returns:
+            pstar:  numpy array of star state pressures. Is 0 for problems with
+                    vacuum.
+            ustar:  numpy array of star state velocities. For problems with
+                    vacuum, see find_star_states.
+        """
+
+        rhoL, uL, pL, rhoR, uR, pR = _broadcast_states(rhoL, uL, pL, rhoR, uR, pR)
+
+        pstar = np.zeros(rhoL.shape, dtype=float)
+        vacuum, ustar, aL, aR = self._vacuum_star_states(rhoL, uL, pL, rhoR, uR, pR)
+
+        solve = ~vacuum
+        ul = uL[solve]
+        pl = pL[solve]
+        ur = uR[solve]
+        pr = pR[solve]
+        al = aL[solve]
+        ar = aR[solve]
+
+        # the numerator is positive everywhere but for vacuum generation
+        plr = (pl / pr) ** self.alpha
+        pstar[solve] = (
+            (al + ar - self.GM1HALF * (ur - ul))
+            / (al / pl**self.alpha + ar / pr**self.alpha)
+        ) ** (1 / self.alpha)
+        ustar[solve] = (plr * ul / al + ur / ar + 2 * (plr - 1) / self.GM1) / (
+            plr / al + 1 / ar
+        )
 
-def _sample_solution(rhoL, rhoR, uL, uR, ustar, pL, pR, pstar, xt):
-    """
-    Sample the solution at the place xt = x/t
+        return pstar, ustar
+
+    def sample_riemann_problems(
+        self, rhoL, uL, pL, rhoR, uR, pR, xt=0.0, solver="exact"
+    ):
+        """
+        Solve many Riemann problems at once and sample their solutions at the
+        places xt = x/t, where x is measured from the initial discontinuity.
+        Problems with and without vacuum may be mixed.
+
+        rhoL, uL, pL:   density, velocity, pressure of the left states
+        rhoR, uR, pR:   density, velocity, pressure of the right states
+        xt:             places to sample the solutions at. xt = 0 gives the
+                        state at the initial discontinuity, as needed for
+                        Godunov fluxes.
+        solver:         how to find the star states: "exact" for the iterative
+                        exact solver (find_star_states), or "trrs" for the
+                        two-rarefaction approximation
+                        (two_rarefaction_star_states)
+
+        All arguments may be numpy arrays or scalars, which are broadcast
+        against each other.
+
+        returns:
+            rho, u, p:  numpy arrays of the sampled solutions
+            ustar:      numpy array of the star state velocities, i.e. the
+                        velocities of the contact discontinuities. Places with
+                        xt < ustar are left of the contact. See find_star_states.
+        """
+
+        rhoL, uL, pL, rhoR, uR, pR, xt = _broadcast_states(
+            rhoL, uL, pL, rhoR, uR, pR, xt
+        )
 
-    (See section 4.2, eq. 35 in
-    mesh-hydro/tex/equations/equations_and_implementation_details.pdf)
-    """
+        if solver == "exact":
+            pstar, ustar, niter = self.find_star_states(rhoL, uL, pL, rhoR, uR, pR)
+        elif solver == "trrs":
+            pstar, ustar = self.two_rarefaction_star_states(rhoL, uL, pL, rhoR, uR, pR)
+        else:
+            raise ValueError("Unknown solver '{0}'".format(solver))
+
+        # both set pstar = 0 exactly for vacuum, and pstar > 0 otherwise
+        vacuum = pstar == 0
+        if not np.any(vacuum):
+            rho, u, p = self._sample_solution(
+                rhoL, rhoR, uL, uR, ustar, pL, pR, pstar, xt
+            )
+            return rho, u, p, ustar
+
+        rho = np.empty(xt.shape, dtype=float)
+        u = np.empty(xt.shape, dtype=float)
+        p = np.empty(xt.shape, dtype=float)
+        solved = ~vacuum
+
+        rho[solved], u[solved], p[solved] = self._sample_solution(
+            rhoL[solved],
+            rhoR[solved],
+            uL[solved],
+            uR[solved],
+            ustar[solved],
+            pL[solved],
+            pR[solved],
+            pstar[solved],
+            xt[solved],
+        )
+        rho[vacuum], u[vacuum], p[vacuum] = self._sample_vacuum_solution(
+            rhoL[vacuum],
+            rhoR[vacuum],
+            uL[vacuum],
+            uR[vacuum],
+            pL[vacuum],
+            pR[vacuum],
+            xt[vacuum],
+        )
+
+        return rho, u, p, ustar
+
+    def _find_star_state(self, rhoL, uL, pL, rhoR, uR, pR):
+        """
+        Find the star state pressure and velocities following Toro 1999
+        returns: pstar, ustar: stare state pressure and velocity
+
+        (See section 4.2.5 in mesh-hydro/tex/equations/equations_and_implementation_details.pdf)
+        """
+
+        pstar, ustar, niter = self.find_star_states(rhoL, uL, pL, rhoR, uR, pR)
+        pstar = float(pstar)
+        ustar = float(ustar)
+
+        print("Found star state pressure after", int(niter), "iterations")
+        print("Got pstar = {0:12.6f}, ustar = {1:12.6f}".format(pstar, ustar))
+
+        return pstar, ustar
 
-    aL = _soundspeed(pL, rhoL)
-    aR = _soundspeed(pR, rhoR)
+    def _vacuum_star_states(self, rhoL, uL, pL, rhoR, uR, pR):
+        """
+        Find the Riemann problems with vacuum, and the velocities of their
+        vacuum fronts. All arguments are numpy arrays of equal shape.
+
+        returns:
+            vacuum:     boolean numpy array, True for problems with vacuum
+            ustar:      numpy array with the velocity of the vacuum front or, if
+                        vacuum is generated, of the middle of the vacuum region.
+                        Is 0 for problems without vacuum.
+            aL, aR:     numpy arrays of the left and right sound speeds. Are 0
+                        where the density is 0.
+        """
+
+        ustar = np.zeros(rhoL.shape, dtype=float)
+
+        # Don't compute square roots of zero
+        hasL = rhoL != 0
+        hasR = rhoR != 0
+        aL = np.zeros(rhoL.shape, dtype=float)
+        aR = np.zeros(rhoL.shape, dtype=float)
+        aL[hasL] = self._soundspeed(pL[hasL], rhoL[hasL])
+        aR[hasR] = self._soundspeed(pR[hasR], rhoR[hasR])
+
+        SL = uL + 2 * aL / self.GM1
+        SR = uR - 2 * aR / self.GM1
+        vacuum = ~hasL | ~hasR | (uR - uL >= 2 / self.GM1 * (aL + aR))
+
+        # left vacuum: front of right rarefaction. right vacuum: front of left
+        # rarefaction. vacuum generation: middle of the vacuum region.
+        ustar[~hasL & hasR] = SR[~hasL & hasR]
+        ustar[hasL & ~hasR] = SL[hasL & ~hasR]
+        generating = vacuum & hasL & hasR
+        ustar[generating] = 0.5 * (SL[generating] + SR[generating])
+
+        return vacuum, ustar, aL, aR
+
+    def _sample_solution(self, rhoL, rhoR, uL, uR, ustar, pL, pR, pstar, xt):
+        """
+        Sample the solution at the places xt = x/t
+
+        (See section 4.2, eq. 35 in
+        mesh-hydro/tex/equations/equations_and_implementation_details.pdf)
+
+        All arguments may be numpy arrays or scalars, which are broadcast
+        against each other. Every region of the solution is evaluated at once
+        for all places that lie within it.
+
+        returns:
+            rho, u, p:  numpy arrays of the broadcast shape of the arguments
+        """
+
+        rhoL, rhoR, uL, uR, ustar, pL, pR, pstar, xt = _broadcast_states(
+            rhoL, rhoR, uL, uR, ustar, pL, pR, pstar, xt
+        )
+
+        rho = np.empty(xt.shape, dtype=float)
+        u = np.empty(xt.shape, dtype=float)
+        p = np.empty(xt.shape, dtype=float)
+
+        aL = self._soundspeed(pL, rhoL)
+        aR = self._soundspeed(pR, rhoR)
+
+        left = xt < ustar
 
-    if xt < ustar:
         # we are in the left region
         psopL = pstar / pL
 
-        if pstar > pL:
-            # left shock
-            SL = uL - aL * np.sqrt(0.5 * GP1 / gamma * psopL + alpha)
-            if xt < SL:
-                # outside left shock
-                rho = rhoL
-                u = uL
-                p = pL
-            else:
-                # inside left shock
-                rho = (psopL + GM1OGP1) / (GM1OGP1 * psopL + 1) * rhoL
-                u = ustar
-                p = pstar
+        # left shock
+        shock = left & (pstar > pL)
+        SL = uL - aL * np.sqrt(0.5 * self.GP1 / self.gamma * psopL + self.alpha)
+        outside = shock & (xt < SL)
+        # outside left shock
+        _set_state(rho, u, p, outside, rhoL, uL, pL)
+        # inside left shock
+        inside = shock & ~outside
+        ps = psopL[inside]
+        rho[inside] = (ps + self.GM1OGP1) / (self.GM1OGP1 * ps + 1) * rhoL[inside]
+        u[inside] = ustar[inside]
+        p[inside] = pstar[inside]
+
+        # left rarefaction
+        fan = left & ~shock
+        # outside the fan
+        outside = fan & (xt < uL - aL)
+        _set_state(rho, u, p, outside, rhoL, uL, pL)
+        fan &= ~outside
+        STL = ustar - aL * psopL ** (self.alpha)
+        # in central region outside fan
+        central = fan & (xt > STL)
+        rho[central] = rhoL[central] * psopL[central] ** (1.0 / self.gamma)
+        u[central] = ustar[central]
+        p[central] = pstar[central]
+        # inside the fan
+        self._set_left_fan(rho, u, p, fan & ~central, rhoL, uL, pL, aL, xt)
 
-        else:
-            # left rarefaction
-            SHL = uL - aL
-            if xt < SHL:
-                # outside the fan
-                rho = rhoL
-                u = uL
-                p = pL
-            else:
-                astarL = aL * psopL ** (alpha)
-                STL = ustar - astarL
-                if xt > STL:
-                    # in central region outside fan
-                    rho = rhoL * psopL ** (1.0 / gamma)
-                    u = ustar
-                    p = pstar
-                else:
-                    # inside the fan
-                    fact = (2 / GP1 + GM1OGP1 / aL * (uL - xt)) ** (2.0 / GM1)
-                    rho = rhoL * fact
-                    u = 2 / GP1 * (GM1HALF * uL + aL + xt)
-                    p = pL * fact**gamma
-
-    else:
         # we are in the right region
+        right = ~left
         psopR = pstar / pR
 
-        if pstar > pR:
-            # right shock
-            SR = uR + aR * np.sqrt(0.5 * GP1 / gamma * psopR + alpha)
-            if xt > SR:
-                # outside right shock
-                rho = rhoR
-                u = uR
-                p = pR
-            else:
-                # inside right shock
-                rho = (psopR + GM1OGP1) / (GM1OGP1 * psopR + 1) * rhoR
-                u = ustar
-                p = pstar
+        # right shock
+        shock = right & (pstar > pR)
+        SR = uR + aR * np.sqrt(0.5 * self.GP1 / self.gamma * psopR + self.alpha)
+        outside = shock & (xt > SR)
+        # outside right shock
+        _set_state(rho, u, p, outside, rhoR, uR, pR)
+        # inside right shock
+        inside = shock & ~outside
+        ps = psopR[inside]
+        rho[inside] = (ps + self.GM1OGP1) / (self.GM1OGP1 * ps + 1) * rhoR[inside]
+        u[inside] = ustar[inside]
+        p[inside] = pstar[inside]
+
+        # right rarefaction
+        fan = right & ~shock
+        # outside the fan
+        outside = fan & (xt > uR + aR)
+        _set_state(rho, u, p, outside, rhoR, uR, pR)
+        fan &= ~outside
+        STR = ustar + aR * psopR**self.alpha
+        # in central region outside fan
+        central = fan & (xt < STR)
+        rho[central] = rhoR[central] * psopR[central] ** (1.0 / self.gamma)
+        u[central] = ustar[central]
+        p[central] = pstar[central]
+        # inside the fan
+        self._set_right_fan(rho, u, p, fan & ~central, rhoR, uR, pR, aR, xt)
 
-        else:
-            # right rarefaction
-            SHR = uR + aR
-            if xt > SHR:
-                # outside the fan
-                rho = rhoR
-                u = uR
-                p = pR
-            else:
-                astarR = aR * psopR**alpha
-                STR = ustar + astarR
-                if xt < STR:
-                    # in central region outside fan
-                    rho = rhoR * psopR ** (1.0 / gamma)
-                    u = ustar
-                    p = pstar
-                else:
-                    # inside the fan
-                    fact = (2 / GP1 - GM1OGP1 / aR * (uR - xt)) ** (2 / GM1)
-                    rho = rhoR * fact
-                    u = 2 / GP1 * (GM1HALF * uR - aR + xt)
-                    p = pR * fact**gamma
-
-    return rho, u, p
-
-
-def _find_star_state(rhoL, uL, pL, rhoR, uR, pR):
-    """
-    Find the star state pressure and velocities following Toro 1999
-    returns: pstar, ustar: stare state pressure and velocity
+        return rho, u, p
 
-    (See section 4.2.5 in mesh-hydro/tex/equations/equations_and_implementation_details.pdf)
-    """
+    def _sample_vacuum_solution(self, rhoL, rhoR, uL, uR, pL, pR, xt):
+        """
+        Sample the solution in the presence of vacuum
+        (See section 4.5,4.6 in mesh-hydro/tex/equations/equations_and_implementation_details.pdf)
+
+        All arguments may be numpy arrays or scalars, which are broadcast
+        against each other, like in _sample_solution. Every element needs to
+        be one of the vacuum cases.
+
+        returns:
+            rho, u, p:  numpy arrays of the broadcast shape of the arguments
+        """
 
-    aL = _soundspeed(pL, rhoL)
-    aR = _soundspeed(pR, rhoR)
-    AL = _A_K(rhoL)
-    AR = _A_K(rhoR)
-    BL = _B_K(pL)
-    BR = _B_K(pR)
-
-    # find initial guess for pstar.
-    # use Two Rarefaction Approximation
-    ppv = 0.5 * (pL + pR) - 0.125 * (uR - uL) * (rhoL + rhoR) * (aL + aR)
-    pstar = max(epsilon, ppv)
-    # use two-shock guess (needs two rarefaction solution as well)
-    #  gL = np.sqrt(AL / (pstar + BL))
-    #  gR = np.sqrt(AR / (pstar + BR))
-    #  pstar = (gL*pL + gR*pR + uL - uR)/(gL + gR)
-    #  pstar = max(epsilon, pstar)
-
-    diff = 1
-    i = 0
-    while diff > epsilon:
-        f = _f_K(pstar, pL, AL, BL, aL) + _f_K(pstar, pR, AR, BR, aR) + uR - uL
-        dfdp = _df_Kdp(pstar, rhoL, pL, AL, BL, aL) + _df_Kdp(
-            pstar, rhoR, pR, AR, BR, aR
+        rhoL, rhoR, uL, uR, pL, pR, xt = _broadcast_states(
+            rhoL, rhoR, uL, uR, pL, pR, xt
         )
-        pstar_new = pstar - f / dfdp
-        diff = 2 * abs(pstar_new - pstar) / abs(pstar_new + pstar)
-        pstar = pstar_new
 
-        if i > 1000:
-            print("Got 1k iterations for exact riemann solver. Exiting now")
-            break
-        i += 1
+        rho = np.zeros(xt.shape, dtype=float)
+        u = np.zeros(xt.shape, dtype=float)
+        p = np.zeros(xt.shape, dtype=float)
+
+        # both sides vacuum: everything stays zero
+        vacL = (rhoL == 0) & (rhoR != 0)
+        vacR = (rhoR == 0) & (rhoL != 0)
+        generating = (rhoL != 0) & (rhoR != 0)
+
+        # don't compute square roots of zero
+        aL = np.zeros(xt.shape, dtype=float)
+        aR = np.zeros(xt.shape, dtype=float)
+        hasL = rhoL != 0
+        hasR = rhoR != 0
+        aL[hasL] = self._soundspeed(pL[hasL], rhoL[hasL])
+        aR[hasR] = self._soundspeed(pR[hasR], rhoR[hasR])
+
+        SL = uL + 2 * aL / self.GM1
+        SR = uR - 2 * aR / self.GM1
+        SHL = uL - aL
+        SHR = uR + aR
 
-        # don't allow negative pressure
-        if pstar < epsilon:
-            pstar = epsilon
+        # left vacuum state
+        # left vacuum
+        vac = vacL & (xt <= SR)
+        u[vac] = SR[vac]
+        # inside right rarefaction
+        fan = vacL & ~vac & (xt < SHR)
+        self._set_right_fan(rho, u, p, fan, rhoR, uR, pR, aR, xt)
+        # in right state
+        _set_state(rho, u, p, vacL & ~vac & ~fan, rhoR, uR, pR)
 
-    print("Found star state pressure after", i, "iterations")
+        # Right vacuum state
+        vac = vacR & (xt >= SL)
+        u[vac] = SL[vac]
+        fan = vacR & ~vac & (xt > SHL)
+        self._set_left_fan(rho, u, p, fan, rhoL, uL, pL, aL, xt)
+        _set_state(rho, u, p, vacR & ~vac & ~fan, rhoL, uL, pL)
 
-    ustar = uL - _f_K(pstar, pL, AL, BL, aL)
-    print("Got pstar = {0:12.6f}, ustar = {1:12.6f}".format(pstar, ustar))
+        # Vacuum generating state
+        # outside left rarefaction, original state
+        outL = generating & (xt <= SHL)
+        _set_state(rho, u, p, outL, rhoL, uL, pL)
+        # inside left rarefaction fan
+        fanL = generating & ~outL & (xt < SL)
+        self._set_left_fan(rho, u, p, fanL, rhoL, uL, pL, aL, xt)
+        # vacuum region
+        vac = generating & ~outL & ~fanL & (xt < SR)
+        u[vac] = 0.5 * (SL[vac] + SR[vac])
+        # inside right rarefaction fan
+        fanR = generating & ~outL & ~fanL & ~vac & (xt < SHR)
+        self._set_right_fan(rho, u, p, fanR, rhoR, uR, pR, aR, xt)
+        # right original state
+        outR = generating & ~outL & ~fanL & ~vac & ~fanR
+        _set_state(rho, u, p, outR, rhoR, uR, pR)
 
-    return pstar, ustar
+        return rho, u, p
 
+    def _set_left_fan(self, rho, u, p, mask, rhoL, uL, pL, aL, xt):
+        """
+        Set the solution inside the left rarefaction fan where mask is True.
+        """
+        a = aL[mask]
+        ul = uL[mask]
+        x = xt[mask]
+        fact = (2 / self.GP1 + self.GM1OGP1 / a * (ul - x)) ** (2.0 / self.GM1)
+        rho[mask] = rhoL[mask] * fact
+        u[mask] = 2 / self.GP1 * (self.GM1HALF * ul + a + x)
+        p[mask] = pL[mask] * fact**self.gamma
+
+    def _set_right_fan(self, rho, u, p, mask, rhoR, uR, pR, aR, xt):
+        """
+        Set the solution inside the right rarefaction fan where mask is True.
+        """
+        a = aR[mask]
+        ur = uR[mask]
+        x = xt[mask]
+        fact = (2 / self.GP1 - self.GM1OGP1 / a * (ur - x)) ** (2 / self.GM1)
+        rho[mask] = rhoR[mask] * fact
+        u[mask] = 2 / self.GP1 * (self.GM1HALF * ur - a + x)
+        p[mask] = pR[mask] * fact**self.gamma
+
+    def _f_K(self, pstar, pK, AK, BK, aK):
+        """
+        Compute f_{K=L, R}
+        (See section 4.6 in mesh-hydro/tex/equations/equations_and_implementation_details.pdf)
+
+        pstar:  p in star region
+        pK: pLeft or pRight
+        AK : 2/(gamma + 1) / rhoK
+        BK : (gamma - 1)/(gamma + 1) * pK
+        aK : sound speed in region K
+
+        All arguments may be numpy arrays.
+        """
+        return np.where(
+            pstar > pK,
+            # shock relation
+            (pstar - pK) * np.sqrt(AK / (pstar + BK)),
+            # rarefaction relation
+            2 * aK / self.GM1 * ((pstar / pK) ** self.alpha - 1),
+        )
 
-def _f_K(pstar, pK, AK, BK, aK):
-    """
-    Compute f_{K=L, R}
-    (See section 4.6 in mesh-hydro/tex/equations/equations_and_implementation_details.pdf)
-
-    pstar:  p in star region
-    pK: pLeft or pRight
-    AK : 2/(gamma + 1) / rhoK
-    BK : (gamma - 1)/(gamma + 1) * pK
-    aK : sound speed in region K
+    def _df_Kdp(self, pstar, rhoK, pK, AK, BK, aK):
+        """
+        Compute  del f_{K=L, R}/dp
+        (See section 4.3 in mesh-hydro/tex/equations/equations_and_implementation_details.pdf)
+
+        pstar:  p in star region
+        pK: pLeft or pRight
+        AK : 2/(gamma + 1) / rhoK
+        BK : (gamma - 1)/(gamma + 1) * pK
+        aK : sound speed in region K
+
+        All arguments may be numpy arrays.
+        """
+        return np.where(
+            pstar > pK,
+            # shock relation
+            (1.0 - 0.5 * (pstar - pK) / (pstar + BK)) * np.sqrt(AK / (pstar + BK)),
+            # rarefaction relation
+            1.0 / (aK * rhoK) * (pstar / pK) ** (-0.5 * self.GP1 / self.gamma),
+        )
+
+    def _A_K(self, rhoK):
+        """
+        Compute A_{L, R}
+        (See section 4.2, eq. 36 in
+        mesh-hydro/tex/equations/equations_and_implementation_details.pdf)
+        """
+        return 2 / (self.GP1 * rhoK)
+
+    def _B_K(self, pK):
+        """
+        Compute B_{L,R}
+        (See section 4.2, eq. 37 in
+        mesh-hydro/tex/equations/equations_and_implementation_details.pdf)
+        """
+        return pK / self.GP1OGM1
+
+    def _soundspeed(self, p, rho):
+        """
+        Compute the sound speed of the gas
+        """
+        return np.sqrt(p * self.gamma / rho)
+
+
+def riemann_solver(rho, u, p, t, gamma=gamma, xmin=0.0, xmax=1.0, x0=None):
     """
-    if pstar > pK:
-        # shock relation
-        return (pstar - pK) * np.sqrt(AK / (pstar + BK))
-    else:
-        # rarefaction relation
-        return 2 * aK / GM1 * ((pstar / pK) ** alpha - 1)
+    Solve the riemann problem for ideal gases
+    and sample the solution at time t.
+    By default, assumes box size is = 1,
+    and that the left and right state are separated
+    at index nx/2, where nx = rho.shape[0]
 
+    rho, u, p are assumed to be numpy arrays of floats
+    containing density, velocity, and pressure of the gas
+    gamma is the adiabatic index, and xmin, xmax, x0 set
+    the geometry of the problem, see RiemannSolver
 
-def _df_Kdp(pstar, rhoK, pK, AK, BK, aK):
-    """
-    Compute  del f_{K=L, R}/dp
-    (See section 4.3 in mesh-hydro/tex/equations/equations_and_implementation_details.pdf)
-
-    pstar:  p in star region
-    pK: pLeft or pRight
-    AK : 2/(gamma + 1) / rhoK
-    BK : (gamma - 1)/(gamma + 1) * pK
-    aK : sound speed in region K
+    returns arrays of equal shapes with the sampled solution
+    for density, velocity and pressure at time t
     """
-    if pstar > pK:
-        # shock relation
-        return (1.0 - 0.5 * (pstar - pK) / (pstar + BK)) * np.sqrt(AK / (pstar + BK))
-    else:
-        # rarefaction relation
-        return 1.0 / (aK * rhoK) * (pstar / pK) ** (-0.5 * GP1 / gamma)
 
+    solver = RiemannSolver(gamma, xmin=xmin, xmax=xmax, x0=x0)
 
-def _A_K(rhoK):
-    """
-    Compute A_{L, R}
-    (See section 4.2, eq. 36 in
-    mesh-hydro/tex/equations/equations_and_implementation_details.pdf)
-    """
-    return 2 / (GP1 * rhoK)
+    return solver.solve(rho, u, p, t)
 
 
-def _B_K(pK):
+def find_star_states(rhoL, uL, pL, rhoR, uR, pR, maxiter=1000, gamma=gamma):
     """
-    Compute B_{L,R}
-    (See section 4.2, eq. 37 in
-    mesh-hydro/tex/equations/equations_and_implementation_details.pdf)
+    Find the star states of many Riemann problems with adiabatic index
+    gamma. See RiemannSolver.find_star_states.
     """
-    return pK / GP1OGM1
 
+    solver = RiemannSolver(gamma)
+
+    return solver.find_star_states(rhoL, uL, pL, rhoR, uR, pR, maxiter=maxiter)
 
-def _soundspeed(p, rho):
+
+def two_rarefaction_star_states(rhoL, uL, pL, rhoR, uR, pR, gamma=gamma):
     """
-    Compute the sound speed of the gas
+    Approximate the star states of many Riemann problems with adiabatic
+    index gamma. See RiemannSolver.two_rarefaction_star_states.
     """
-    return np.sqrt(p * gamma / rho)
+
+    solver = RiemannSolver(gamma)
+
+    return solver.two_rarefaction_star_states(rhoL, uL, pL, rhoR, uR, pR)
 
 
-def _sample_vacuum_solution(rhoL, rhoR, uL, uR, pL, pR, xt):
+def sample_riemann_problems(
+    rhoL, uL, pL, rhoR, uR, pR, xt=0.0, solver="exact", gamma=gamma
+):
     """
-    Sample the solution in the presence of vacuum
-    (See section 4.5,4.6 in mesh-hydro/tex/equations/equations_and_implementation_details.pdf)
+    Solve many Riemann problems with adiabatic index gamma at once and
+    sample their solutions. See RiemannSolver.sample_riemann_problems.
     """
 
-    if rhoL == 0 and rhoR == 0:
-        return 0.0, 0.0, 0.0
+    riemann = RiemannSolver(gamma)
 
-    if rhoL == 0:
-        # left vacuum state
-        aR = _soundspeed(pR, rhoR)
-        SR = uR - 2 * aR / GM1
-        SHR = uR + aR
+    return riemann.sample_riemann_problems(
+        rhoL, uL, pL, rhoR, uR, pR, xt=xt, solver=solver
+    )
 
-        if xt <= SR:
-            # left vacuum
-            rho = 0
-            u = SR
-            p = 0
-        elif xt < SHR:
-            # inside right rarefaction
-            fact = (2 / GP1 - GM1OGP1 / aR * (uR - xt)) ** (2 / GM1)
-            rho = rhoR * fact
-            u = 2 / GP1 * (GM1HALF * uR - aR + xt)
-            p = pR * fact**gamma
-        else:
-            # in right state
-            rho = rhoR
-            u = uR
-            p = pR
 
-    elif rhoR == 0:
-        # Right vacuum state
-        aL = _soundspeed(pL, rhoL)
-        SL = uL + 2 * aL / GM1
-        SHL = uL - aL
-
-        if xt >= SL:
-            rho = 0
-            u = SL
-            p = 0
-        elif xt > SHL:
-            fact = (2 / GP1 + GM1OGP1 / aL * (uL - xt)) ** (2 / GM1)
-            rho = rhoL * fact
-            u = 2 / GP1 * (GM1HALF * uL + aL + xt)
-            p = pL * fact**gamma
-        else:
-            rho = rhoL
-            u = uL
-            p = pL
-    else:
-        # Vacuum generating state
-        aL = _soundspeed(pL, rhoL)
-        aR = _soundspeed(pR, rhoR)
-        SL = uL + 2 * aL / GM1
-        SR = uR - 2 * aR / GM1
-        SHL = uL - aL
-        SHR = uR + aR
+def _broadcast_states(*args):
+    """
+    Turn all arguments into float arrays of their common broadcast shape.
+    """
+    return np.broadcast_arrays(*[np.asarray(a, dtype=float) for a in args])
 
-        if xt <= SHL:
-            # outside left rarefaction, original state
-            rho = rhoL
-            u = uL
-            p = pL
-        elif xt < SL:
-            # inside left rarefaction fan
-            fact = (2 / GP1 + GM1OGP1 / aL * (uL - xt)) ** (2 / GM1)
-            rho = rhoL * fact
-            u = 2 / GP1 * (GM1HALF * uL + aL + xt)
-            p = pL * fact**gamma
-        elif xt < SR:
-            # vacuum region
-            rho = 0
-            u = 0.5 * (SL + SR)
-            p = 0
-        elif xt < SHR:
-            # inside right rarefaction fan
-            fact = (2 / GP1 - GM1OGP1 / aR * (uR - xt)) ** (2 / GM1)
-            rho = rhoR * fact
-            u = 2 / GP1 * (GM1HALF * uR - aR + xt)
-            p = pR * fact**gamma
-        else:
-            # right original state
-            rho = rhoR
-            u = uR
-            p = pR
 
-    return rho, u, p
+def _set_state(rho, u, p, mask, rhoK, uK, pK):
+    """
+    Set the solution to the original left or right state where mask is True.
+    """
+    rho[mask] = rhoK[mask]
+    u[mask] = uK[mask]
+    p[mask] = pK[mask]
@@ -7,6 +7,8 @@
 
 from sys import argv
 import os
+import re
+import time
 
 
 def get_only_cmdlinearg():
@@ -25,31 +27,189 @@ def get_only_cmdlinearg():
         return argv[1]
 
 
-def get_all_files_with_same_basename(fname):
+# Output file names: <basename>-<snapshot number>.out, optionally compressed.
+_OUTPUT_NAME = re.compile(r"^(.*)[-_](\d{4,})\.out(\.gz|\.bz2|\.xz|\.zst)?$")
+
+# Directory indices kept by get_output_index, keyed by the absolute path of
+# the directory and the path as given. The indices build file paths from the
+# path as given, which must still refer to the same directory when the
+# index is reused after the working directory changed.
+_output_indices = {}
+
+
+class OutputIndex:
     """
-    Get a list of all files with the same basename as given file <fname>.
-    Basename in this case means everything before _XXXX.out, which is the
-    format of the hydro output files.
+    Index of the output files in a directory, grouped by run. Output files
+    are named <basename>-XXXX.out, where XXXX is the snapshot number with at
+    least 4 digits. Files of the same run are sorted by their snapshot
+    number.
+
+    The directory is scanned once when the index is created. refresh()
+    only parses names that weren't seen before, and skips the scan entirely
+    if the directory hasn't been modified since.
+
+    directory:  directory containing the output files
+
+    attributes:
+        directory:  directory containing the output files
+    """
+
+    def __init__(self, directory="."):
+        self.directory = directory
+        # basename -> list of (snapshot number, file name)
+        self._runs = {}
+        # file name -> basename, for all known output files
+        self._names = {}
+        self._mtime = None
+        self.refresh()
+
+    def __repr__(self):
+        return "OutputIndex('{0}', runs={1:d}, files={2:d})".format(
+            self.directory, len(self._runs), len(self._names)
+        )
+
+    def __len__(self):
+        return len(self._names)
+
+    def refresh(self, force=False):
+        """
+        Update the index with the output files added to or removed from the
+        directory since the last scan.
+
+        force:  scan the directory even if its modification time didn't
+                change.
+
+        returns:
+            list of paths of the new output files, sorted by basename and
+            snapshot number
+        """
+
+        stat = os.stat(self.directory)
+        # file systems with coarse timestamps may not change the mtime of
+        # the directory for files added right after the last scan
+        recent = time.time_ns() - stat.st_mtime_ns < 2 * 10**9
+        if not force and not recent and stat.st_mtime_ns == self._mtime:
+            return []
+        self._mtime = stat.st_mtime_ns
+
+        present = set()
+        new = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                name = entry.name
+                present.add(name)
+                if name in self._names:
+                    continue
+                match = _OUTPUT_NAME.match(name)
+                if match is None:
+                    continue
+                basename = match.group(1)
+                snapshot = int(match.group(2))
+                self._names[name] = basename
+                self._runs.setdefault(basename, []).append((snapshot, name))
+                new.append((basename, snapshot, name))
+
+        removed = [name for name in self._names if name not in present]
+        for name in removed:
+            basename = self._names.pop(name)
+            run = [entry for entry in self._runs[basename] if entry[1] != name]
+            if len(run) == 0:
+                del self._runs[basename]
+            else:
+                self._runs[basename] = run
+
+        for run in self._runs.values():
+            run.sort()
+        new.sort()
+
+        return [self._path(name) for basename, snapshot, name in new]
+
+    def basenames(self):
+        """
+        Get the sorted list of the basenames of all runs in the directory.
+        """
+        return sorted(self._runs)
+
+    def files(self, basename):
+        """
+        Get the list of paths of all output files of the run with the given
+        basename, sorted by snapshot number.
+        """
+        return [self._path(name) for snapshot, name in self._runs.get(basename, [])]
+
+    def snapshots(self, basename):
+        """
+        Get the list of snapshot numbers of the run with the given basename,
+        sorted.
+        """
+        return [snapshot for snapshot, name in self._runs.get(basename, [])]
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+
+def get_output_index(directory=".", refresh=True):
+    """
+    Get the OutputIndex of the given directory. Indices are kept for the
+    lifetime of the process, so that repeated calls don't rescan the
+    directory.
+
+    directory:  directory containing the output files
+    refresh:    if True, pick up files added or removed since the last call
 
-    Returns: list of file names (str)
+    returns:
+        OutputIndex of the directory
     """
 
-    # first generate basename
-    basename = fname[:-9]  # remove -0000.out
+    key = (os.path.abspath(directory), directory)
+    index = _output_indices.get(key)
+    if index is None:
+        index = OutputIndex(directory)
+        _output_indices[key] = index
+    elif refresh:
+        index.refresh()
 
-    basedir = os.path.dirname(basename)
-    if basedir == "":
-        basedir = os.getcwd()
+    return index
 
-    allfiles = os.listdir(basedir)
 
-    filelist = []
+def split_output_name(fname):
+    """
+    Split the name of an output file into its basename and snapshot number,
+    e.g. "run/sod-0012.out" into ("sod", 12). The directory is dropped.
+
+    returns:
+        basename:   everything before -XXXX.out
+        snapshot:   the snapshot number as an integer
+    """
+
+    match = _OUTPUT_NAME.match(os.path.basename(fname))
+    if match is None:
+        raise ValueError(
+            "'{0}' isn't named like an output file (<basename>-XXXX.out)".format(fname)
+        )
+
+    return match.group(1), int(match.group(2))
 
-    for f in allfiles:
-        if f.startswith(basename) and f.endswith(".out"):
-            filelist.append(f)
 
-    filelist.sort()
+def get_all_files_with_same_basename(fname):
+    """
+    Get a list of all files with the same basename as given file <fname>.
+    Basename in this case means everything before -XXXX.out, which is the
+    format of the hydro output files. The files are looked up in the same
+    directory as <fname>, and sorted by their snapshot number.
+
+    Returns: list of file names (str), including the directory of <fname>
+    """
+
+    basename, snapshot = split_output_name(fname)
+    dirname = os.path.dirname(fname)
+    index = get_output_index(dirname or ".")
+
+    # the index of the working directory prefixes "./", so use the
+    # directory as given in fname
+    filelist = []
+    for f in index.files(basename):
+        filelist.append(os.path.join(dirname, os.path.basename(f)))
 
     return filelist
 
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+
+# -------------------------------------------------------
+# Module to process the outputs of a running simulation
+# as soon as they have been written.
+# -------------------------------------------------------
+
+
+import json
+import os
+import time
+
+from .mesh_hydro_io import output_is_complete
+from .mesh_hydro_utilities import get_output_index
+
+
+class OutputWatcher:
+    """
+    Watch a run directory for new output files while the simulation is
+    running, and pass every new output to the registered callbacks once it
+    has been written completely. The outputs of every run are processed in
+    the order of their snapshot numbers.
+
+    An output counts as complete when its size matches the size expected
+    from its header. If that can't be decided (e.g. compressed outputs), it
+    counts as complete once its size didn't change between two polls.
+
+    directory:  directory containing the output files
+    basename:   if not None, only watch the outputs of the run with this
+                basename, i.e. everything before -XXXX.out. Otherwise, watch
+                all runs in the directory.
+    progress:   if not None, file name to keep the progress in. The last
+                processed snapshot of every run is stored there after every
+                output, so that a restarted watcher continues where the
+                previous one stopped.
+
+    attributes:
+        directory:  directory containing the output files
+        basename:   basename of the watched run, or None
+        progress:   file name of the progress file, or None
+        callbacks:  list of registered callbacks
+    """
+
+    def __init__(self, directory=".", basename=None, progress=None):
+        self.directory = directory
+        self.basename = basename
+        self.progress = progress
+        self.callbacks = []
+
+        # basename -> last processed snapshot number
+        self._done = {}
+        # path -> size at the last poll, for outputs whose completeness
+        # can't be decided from the header
+        self._sizes = {}
+
+        if progress is not None and os.path.exists(progress):
+            with open(progress) as f:
+                self._done = json.load(f)["done"]
+
+    def __repr__(self):
+        return "OutputWatcher('{0}', basename={1}, callbacks={2:d})".format(
+            self.directory, self.basename, len(self.callbacks)
+        )
+
+    def register(self, callback):
+        """
+        Register a callback. It is called with the file name of every new
+        output as its only argument. Returns the callback, so this can be
+        used as a decorator.
+        """
+
+        self.callbacks.append(callback)
+
+        return callback
+
+    def poll(self):
+        """
+        Look for new complete outputs once, and pass them to the callbacks.
+        If a callback raises an exception, the output isn't marked as
+        processed.
+
+        returns:
+            list of file names of the outputs processed
+        """
+
+        index = get_output_index(self.directory)
+
+        if self.basename is None:
+            basenames = index.basenames()
+        else:
+            basenames = [self.basename]
+
+        processed = []
+        for basename in basenames:
+            last = self._done.get(basename, -1)
+            for snapshot, fname in zip(
+                index.snapshots(basename), index.files(basename)
+            ):
+                if snapshot <= last:
+                    continue
+                # outputs are written one after the other, so there's
+                # nothing to do past the first incomplete one
+                if not self._is_complete(fname):
+                    break
+
+                for callback in self.callbacks:
+                    callback(fname)
+
+                self._done[basename] = snapshot
+                self._save_progress()
+                processed.append(fname)
+
+        return processed
+
+    def run(self, interval=2.0, timeout=None):
+        """
+        Poll for new outputs every interval seconds.
+
+        interval:   time between polls in seconds
+        timeout:    stop once no new output was processed for this many
+                    seconds. If None, run until interrupted.
+
+        returns:
+            number of outputs processed
+        """
+
+        count = 0
+        last_new = time.monotonic()
+
+        while True:
+            processed = self.poll()
+            count += len(processed)
+            if len(processed) > 0:
+                last_new = time.monotonic()
+
+            if timeout is not None and time.monotonic() - last_new >= timeout:
+                break
+
+            time.sleep(interval)
+
+        return count
+
+    def _is_complete(self, fname):
+        """
+        Check whether the output fname has been written completely.
+        """
+
+        complete = output_is_complete(fname)
+        if complete is not None:
+            return complete
+
+        size = os.path.getsize(fname)
+        complete = self._sizes.get(fname) == size
+        if complete:
+            del self._sizes[fname]
+        else:
+            self._sizes[fname] = size
+
+        return complete
+
+    def _save_progress(self):
+        """
+        Write the progress file, if there is one.
+        """
+
+        if self.progress is None:
+            return
+
+        # write to a temporary file first so that it is never left incomplete
+        tmpfile = "{0}.{1:d}.tmp".format(self.progress, os.getpid())
+        with open(tmpfile, "w") as f:
+            json.dump(
+                {"directory": os.path.abspath(self.directory), "done": self._done}, f
+            )
+        os.replace(tmpfile, self.progress)
+
+        return
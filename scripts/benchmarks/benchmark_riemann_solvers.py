@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+
+# ------------------------------------------------------------------------------------
+# Benchmark the Riemann solvers available for Godunov fluxes. Solves the
+# Riemann problems of n random interfaces with every solver, and prints the
+# time per interface as well as the error of the fluxes relative to the
+# exact solver.
+#
+# The error is the L1 norm of the flux differences of every conserved
+# quantity, divided by the L1 norm of the exact fluxes.
+#
+# Usage:
+#   benchmark_riemann_solvers.py        # use default n
+# or:
+#   benchmark_riemann_solvers.py <n>
+# ------------------------------------------------------------------------------------
+
+
+from mesh_hydro_utils import interface_fluxes
+
+from sys import argv
+import time
+
+import numpy as np
+
+
+n_default = 1000000
+solvers = ["exact", "trrs", "hll", "hllc", "roe"]
+quantities = ["mass", "momentum", "momentum_t", "energy"]
+
+# repeat every measurement this many times and keep the fastest
+nrepeat = 3
+
+
+def random_states(n):
+    """
+    Generate n random pairs of left and right states, including tangential
+    velocities.
+
+    returns:
+        rhoL, uL, pL, rhoR, uR, pR, utL, utR: numpy arrays of the states
+    """
+
+    rng = np.random.default_rng(42)
+
+    rhoL = rng.uniform(0.1, 10.0, size=n)
+    rhoR = rng.uniform(0.1, 10.0, size=n)
+    uL = rng.uniform(-1.0, 1.0, size=n)
+    uR = rng.uniform(-1.0, 1.0, size=n)
+    pL = rng.uniform(0.1, 10.0, size=n)
+    pR = rng.uniform(0.1, 10.0, size=n)
+    utL = rng.uniform(-1.0, 1.0, size=n)
+    utR = rng.uniform(-1.0, 1.0, size=n)
+
+    return rhoL, uL, pL, rhoR, uR, pR, utL, utR
+
+
+def time_solver(solver, states):
+    """
+    Compute the interface fluxes with the given solver.
+
+    returns:
+        fluxes: list of the flux arrays
+        best:   fastest wall clock time in seconds
+    """
+
+    best = None
+    for r in range(nrepeat):
+        start = time.perf_counter()
+        fluxes = interface_fluxes(*states, solver=solver)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return fluxes, best
+
+
+if __name__ == "__main__":
+    if len(argv) > 1:
+        n = int(argv[1])
+    else:
+        n = n_default
+
+    states = random_states(n)
+
+    print("Solving", n, "Riemann problems")
+    print(
+        "{0:>8s} {1:>14s} {2:>10s}".format("solver", "time/interface", "speedup"),
+        end="",
+    )
+    for q in quantities:
+        print(" {0:>12s}".format(q), end="")
+    print()
+
+    exact = None
+    for solver in solvers:
+        fluxes, elapsed = time_solver(solver, states)
+        if exact is None:
+            exact = fluxes
+            exact_time = elapsed
+
+        print(
+            "{0:>8s} {1:12.3e} s {2:10.2f}".format(
+                solver, elapsed / n, exact_time / elapsed
+            ),
+            end="",
+        )
+        for F, Fexact in zip(fluxes, exact):
+            error = np.sum(np.abs(F - Fexact)) / np.sum(np.abs(Fexact))
+            print(" {0:12.3e}".format(error), end="")
+        print()
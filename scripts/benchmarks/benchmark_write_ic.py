@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+
+# ------------------------------------------------------------------------------------
+# Benchmark writing IC files with write_ic. Writes random 1D and 2D ICs for
+# a range of nx into a temporary directory and prints the achieved number of
+# cells written per second.
+#
+# Usage:
+#   benchmark_write_ic.py               # use default nx values
+# or:
+#   benchmark_write_ic.py <nx1> <nx2> ... <nxN>
+# ------------------------------------------------------------------------------------
+
+
+from mesh_hydro_utils import write_ic
+
+from sys import argv
+import os
+import tempfile
+import time
+
+import numpy as np
+
+
+nx_1D_default = [1000, 100000, 1000000]
+nx_2D_default = [128, 512, 1024, 2048]
+
+# repeat every measurement this many times and keep the fastest
+nrepeat = 3
+
+
+def time_write_ic(ndim, nx, tmpdir):
+    """
+    Write a random IC of dimension ndim with nx cells per dimension
+    and return the fastest wall clock time in seconds.
+    """
+
+    rng = np.random.default_rng(42)
+    if ndim == 1:
+        shape = (nx,)
+    else:
+        shape = (nx, nx)
+
+    rho = rng.uniform(0.1, 10.0, size=shape)
+    u = rng.uniform(-1.0, 1.0, size=shape + (ndim,))
+    if ndim == 1:
+        u = u[..., 0]
+    p = rng.uniform(0.1, 10.0, size=shape)
+
+    fname = os.path.join(tmpdir, "benchmark-{0:d}D-{1:d}.dat".format(ndim, nx))
+
+    best = None
+    for r in range(nrepeat):
+        start = time.perf_counter()
+        write_ic(fname, ndim, rho, u, p)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+
+    os.remove(fname)
+
+    return best
+
+
+if __name__ == "__main__":
+    if len(argv) > 1:
+        nx_list = [int(arg) for arg in argv[1:]]
+        nx_1D = nx_list
+        nx_2D = nx_list
+    else:
+        nx_1D = nx_1D_default
+        nx_2D = nx_2D_default
+
+    print(
+        "{0:>4s} {1:>10s} {2:>12s} {3:>12s} {4:>14s}".format(
+            "ndim", "nx", "cells", "time [s]", "cells/s"
+        )
+    )
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for ndim, nx_dim in [(1, nx_1D), (2, nx_2D)]:
+            for nx in nx_dim:
+                ncells = nx**ndim
+                elapsed = time_write_ic(ndim, nx, tmpdir)
+                print(
+                    "{0:4d} {1:10d} {2:12d} {3:12.4f} {4:14.3e}".format(
+                        ndim, nx, ncells, elapsed, ncells / elapsed
+                    )
+                )
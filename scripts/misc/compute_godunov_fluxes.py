@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+
+
+# ------------------------------------------------------------------------------------
+# Compute the Godunov fluxes through all cell interfaces of an output file
+# with every available Riemann solver, and print the total fluxes per
+# dimension. Also checks the fluxes for sanity: They must be finite, and
+# every solver must give the physical fluxes for a uniform state, set to the
+# state of the first cell of the output. Finally, the exact fluxes through
+# single interfaces with the states of some standard Riemann problems (Toro,
+# Riemann Solvers and Numerical Methods for Fluid Dynamics, section 4.3.3)
+# must be the physical fluxes of the solution of riemann_solver at x/t = 0.
+#
+# Usage:
+#   compute_godunov_fluxes.py <file>
+# or:
+#   compute_godunov_fluxes.py <file> <solver1> ... <solverN>
+# ------------------------------------------------------------------------------------
+
+
+from mesh_hydro_utils import read_output, godunov_fluxes, interface_fluxes
+from mesh_hydro_utils import riemann_solver
+from mesh_hydro_utils.mesh_hydro_riemann import gamma
+
+from contextlib import redirect_stdout
+from io import StringIO
+from sys import argv
+
+import numpy as np
+
+
+solvers_default = ["exact", "trrs", "hll", "hllc", "roe"]
+quantities = ["mass", "momentum", "energy"]
+
+# left and right density, velocity, and pressure
+riemann_problems = [
+    (1.0, 0.0, 1.0, 0.125, 0.0, 0.1),
+    (1.0, -2.0, 0.4, 1.0, 2.0, 0.4),
+    (1.0, 0.0, 1000.0, 1.0, 0.0, 0.01),
+    (1.0, 0.0, 0.01, 1.0, 0.0, 100.0),
+    (5.99924, 19.5975, 460.894, 5.99242, -6.19633, 46.0950),
+    (1.0, 0.75, 1.0, 0.125, 0.0, 0.1),
+]
+
+
+def physical_fluxes(rho, u, p, gamma):
+    """
+    Compute the mass, momentum, and energy fluxes of a state moving with
+    velocity u normal to the interface.
+    """
+
+    mass = rho * u
+    momentum = mass * u + p
+    energy = (p / (gamma - 1) + 0.5 * mass * u + p) * u
+
+    return mass, momentum, energy
+
+
+def check_fluxes(fluxes, solver):
+    """
+    Check that the fluxes are finite. Raises a ValueError otherwise.
+    """
+
+    for flux in fluxes:
+        for name, F in zip(quantities, flux):
+            if not np.all(np.isfinite(F)):
+                raise ValueError(
+                    "Got non-finite {0} fluxes with solver {1}".format(name, solver)
+                )
+
+    return
+
+
+def check_riemann_problems(gamma):
+    """
+    Check that the fluxes through an interface between the left and right
+    states of the riemann_problems are the physical fluxes of the solution
+    of riemann_solver at x/t = 0. Raises a ValueError otherwise.
+    """
+
+    for rhoL, uL, pL, rhoR, uR, pR in riemann_problems:
+        fluxes = interface_fluxes(
+            np.array([rhoL]),
+            np.array([uL]),
+            np.array([pL]),
+            np.array([rhoR]),
+            np.array([uR]),
+            np.array([pR]),
+            gamma=gamma,
+        )
+
+        # With two cells at a very late time, the centre of the right cell
+        # is at x/t = 0 up to 1e-9. The solution is continuous there, or only
+        # the density jumps over a contact at rest, which doesn't change the
+        # fluxes.
+        with redirect_stdout(StringIO()):
+            rho, u, p = riemann_solver(
+                np.array([rhoL, rhoR]),
+                np.array([uL, uR]),
+                np.array([pL, pR]),
+                2.5e8,
+                gamma=gamma,
+            )
+        expected = physical_fluxes(rho[1], u[1], p[1], gamma)
+
+        for name, F, F0 in zip(quantities, fluxes, expected):
+            if not np.allclose(F, F0, rtol=1e-8, atol=1e-10):
+                raise ValueError(
+                    "{0} flux {1} of Riemann problem {2} should be {3}".format(
+                        name, F[0], (rhoL, uL, pL, rhoR, uR, pR), F0
+                    )
+                )
+
+    return
+
+
+def check_uniform(ndim, rho, u, p, solver, gamma):
+    """
+    Check that the fluxes of a uniform state with the density, velocity,
+    and pressure of the first cell are the physical fluxes. Raises a
+    ValueError otherwise.
+    """
+
+    rho0 = np.full(rho.shape, rho.flat[0])
+    p0 = np.full(p.shape, p.flat[0])
+    if ndim == 1:
+        u0 = np.full(u.shape, u.flat[0])
+    else:
+        u0 = np.empty(u.shape)
+        u0[...] = u.reshape((-1, 2))[0]
+
+    vsq = np.sum(u0.reshape((-1, ndim))[0] ** 2)
+    E = p0.flat[0] / (gamma - 1) + 0.5 * rho0.flat[0] * vsq
+
+    fluxes = godunov_fluxes(ndim, rho0, u0, p0, solver=solver, gamma=gamma)
+    for dim, (mass, momentum, energy) in enumerate(fluxes):
+        un = u0.reshape((-1, ndim))[0][dim]
+        expected = [rho0.flat[0] * un, (E + p0.flat[0]) * un]
+        for name, F, F0 in zip(("mass", "energy"), (mass, energy), expected):
+            if not np.allclose(F, F0, rtol=1e-12, atol=1e-12):
+                raise ValueError(
+                    "{0} fluxes of a uniform state with solver {1} are wrong".format(
+                        name, solver
+                    )
+                )
+
+        momentum_expected = rho0.flat[0] * un * u0.reshape((-1, ndim))[0]
+        momentum_expected[dim] += p0.flat[0]
+        if ndim == 1:
+            momentum_expected = momentum_expected[0]
+        if not np.allclose(momentum, momentum_expected, rtol=1e-12, atol=1e-12):
+            raise ValueError(
+                "momentum fluxes of a uniform state with solver {0} are wrong".format(
+                    solver
+                )
+            )
+
+    return
+
+
+if __name__ == "__main__":
+    if len(argv) < 2:
+        print(argv)
+        raise ValueError("Usage: compute_godunov_fluxes.py <file> [solver1 ...]")
+
+    fname = argv[1]
+    solvers = argv[2:]
+    if len(solvers) == 0:
+        solvers = solvers_default
+
+    ndim, rho, u, p, t, step = read_output(fname)
+
+    check_riemann_problems(gamma)
+
+    print("{0:>8s} {1:>4s}".format("solver", "dim"), end="")
+    for q in quantities:
+        print(" {0:>17s}".format(q), end="")
+    print()
+
+    for solver in solvers:
+        fluxes = godunov_fluxes(
+            ndim, rho, u, p, boundary="periodic", solver=solver, gamma=gamma
+        )
+        check_fluxes(fluxes, solver)
+        check_uniform(ndim, rho, u, p, solver, gamma)
+
+        for dim, flux in enumerate(fluxes):
+            print("{0:>8s} {1:>4s}".format(solver, "xy"[dim]), end="")
+            for F in flux:
+                if F.ndim > rho.ndim:
+                    # momentum: print the normal component
+                    F = F[..., dim]
+                print(" {0:17.10e}".format(np.sum(F)), end="")
+            print()
@@ -3,62 +3,93 @@
 
 # ------------------------------------------------------------------------------------
 # Convert mesh-hydro output to hdf5.
-# Create a hdf5 output file for every file given as cmdline argument.
+# By default, create a hdf5 output file for every file given as cmdline
+# argument. The hdf5 files can be read by read_output like the original
+# outputs.
+#
+# With --run <outfile>, convert all given files into a single hdf5 file with a
+# time axis instead, reading the outputs in parallel. Read it back with
+# read_hdf5_run. With --append, only outputs with a step larger than the last
+# one already stored in <outfile> are added.
 #
 # Usage:
-#   convert_to_hdf5.py <file1> <file2> ... <fileN>
+#   convert_to_hdf5.py [options] <file1> <file2> ... <fileN>
+#
+# Options:
+#   --run <outfile>         write all outputs into <outfile>
+#   --append                add new outputs to an existing <outfile>
+#   --workers <n>           number of processes reading outputs for --run
+#   --precision <p>         "single" (default) or "double"
+#   --compression <c>       "gzip" (default), "lzf", or "none"
+#   --shuffle               use the shuffle filter
 # ------------------------------------------------------------------------------------
 
-from sys import argv, exit
-
-try:
-    import h5py
-except ImportError:
-    print("Couldn't import h5py. Did you install with the hdf5 option enabled?")
-    exit(1)
+import argparse
+import os
 
+from mesh_hydro_utils import read_output, write_hdf5, convert_outputs_to_hdf5
 
-from mesh_hydro_utils import (
-    read_output,
-)
 
-
-def dump_hdf5(fname):
+def dump_hdf5(fname, dtype="f", compression="gzip", shuffle=False):
     """
     Dump output from file `fname` as a hdf5 file.
     """
 
     ndim, rho, u, p, t, step = read_output(fname)
-    outfile = fname.replace("out", "hdf5")
+    outfile = os.path.splitext(fname)[0] + ".hdf5"
     print("Writing output file", outfile)
 
-    hfile = h5py.File(outfile, "w")
-
-    data = hfile.create_group("data")
-
-    drho = data.create_dataset("density", rho.shape, dtype="f", compression="gzip")
-    drho[:] = rho[:]
-
-    du = data.create_dataset("velocity", u.shape, dtype="f", compression="gzip")
-    du[:] = u[:]
-
-    dp = data.create_dataset("pressure", p.shape, dtype="f", compression="gzip")
-    dp[:] = p[:]
-
-    metadata = hfile.create_group("metadata")
-    metadata.attrs["ndim"] = ndim
-    metadata.attrs["time"] = t
-    metadata.attrs["step"] = step
-    hfile.close()
+    write_hdf5(
+        outfile,
+        ndim,
+        rho,
+        u,
+        p,
+        t,
+        step,
+        dtype=dtype,
+        compression=compression,
+        shuffle=shuffle,
+    )
 
     return
 
 
 if __name__ == "__main__":
-    filelist = argv[1:]
+    parser = argparse.ArgumentParser(description="Convert mesh-hydro output to hdf5.")
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--run", default=None)
+    parser.add_argument("--append", action="store_true")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--precision", choices=("single", "double"), default="single")
+    parser.add_argument(
+        "--compression", choices=("gzip", "lzf", "none"), default="gzip"
+    )
+    parser.add_argument("--shuffle", action="store_true")
+    args = parser.parse_args()
+
+    filelist = args.files
 
     if len(filelist) == 0:
         raise ValueError("You need to provide me with output file(s) to convert.")
 
-    for fname in filelist:
-        dump_hdf5(fname)
+    dtype = {"single": "f", "double": "d"}[args.precision]
+    compression = args.compression
+    if compression == "none":
+        compression = None
+
+    if args.run is None:
+        for fname in filelist:
+            dump_hdf5(fname, dtype, compression, args.shuffle)
+    else:
+        print("Writing output file", args.run)
+        nwritten = convert_outputs_to_hdf5(
+            filelist,
+            args.run,
+            append=args.append,
+            workers=args.workers,
+            dtype=dtype,
+            compression=compression,
+            shuffle=args.shuffle,
+        )
+        print("Added", nwritten, "outputs")
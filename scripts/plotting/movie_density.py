@@ -19,7 +19,7 @@
 from mesh_hydro_utils import (
     get_only_cmdlinearg,
     get_all_files_with_same_basename,
-    read_output,
+    prefetch_outputs,
     plot_get_figname,
 )
 from mpl_toolkits.axes_grid1 import make_axes_locatable, axes_size
@@ -173,9 +173,9 @@ if __name__ == "__main__":
     else:
         filelist = argv[1:]
 
-    for fname in filelist:
-        ndim, rho, u, p, t, step = read_output(fname)
-
+    for fname, (ndim, rho, u, p, t, step) in prefetch_outputs(
+        filelist, fields=("rho",)
+    ):
         if ndim == 1:
             plot_1D_density_only(rho, fname, dots=False, t=t)
         elif ndim == 2:
@@ -11,7 +11,7 @@
 # ------------------------------------------------------------------------------------
 
 
-from mesh_hydro_utils import read_output, plot_1D, plot_2D_velnorm, plot_savefig
+from mesh_hydro_utils import prefetch_outputs, plot_1D, plot_2D_velnorm, plot_savefig
 
 from sys import argv
 import numpy as np
@@ -20,9 +20,7 @@ import numpy as np
 if __name__ == "__main__":
     filelist = argv[1:]
 
-    for fname in filelist:
-        ndim, rho, u, p, t, step = read_output(fname)
-
+    for fname, (ndim, rho, u, p, t, step) in prefetch_outputs(filelist):
         if ndim == 1:
             fig = plot_1D(rho, np.abs(u), p)
         elif ndim == 2:
@@ -25,6 +25,7 @@ from mesh_hydro_utils import (
     get_all_files_with_same_basename,
     label_to_kwargs,
     read_output,
+    read_output_headers,
     plot_1D_density_only,
     plot_savefig,
 )
@@ -39,37 +40,28 @@ if __name__ == "__main__":
     else:
         filelist = argv[1:]
 
-    fig = None
-    tlist = []
-    label_is_fname = False
-    i = 0
-    while i < len(filelist):
-        f = filelist[i]
-
-        ndim, rho, u, p, t, step = read_output(f)
-
-        # store first time and file name
-        if not label_is_fname:
-            if t not in tlist:
-                tlist.append(t)
-                labelval = t
-            else:
-                label_is_fname = True
-                labelval = f
-                fig = None
-                i = 0  # restart!
-                continue
-        else:
-            labelval = f
-
+    # decide on labels and dimensions using only the file headers
+    headers = read_output_headers(filelist)
+    for header in headers:
+        ndim = header[0]
         if ndim != 1:
             print("I can't overplot 2D stuff...")
             quit(1)
+
+    # if some output times appear more than once, label lines by file name
+    tlist = [header[2] for header in headers]
+    label_is_fname = len(set(tlist)) != len(tlist)
+
+    fig = None
+    for f, t in zip(filelist, tlist):
+        if label_is_fname:
+            labelval = f
         else:
-            fig = plot_1D_density_only(
-                rho, draw_legend=True, fig=fig, kwargs=label_to_kwargs(labelval)
-            )
+            labelval = t
 
-        i += 1
+        ndim, rho, u, p, t, step = read_output(f, fields=("rho",))
+        fig = plot_1D_density_only(
+            rho, draw_legend=True, fig=fig, kwargs=label_to_kwargs(labelval)
+        )
 
     plot_savefig(fig, f, case="density-overplotted")
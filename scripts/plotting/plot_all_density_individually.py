@@ -11,7 +11,7 @@
 
 
 from mesh_hydro_utils import (
-    read_output,
+    prefetch_outputs,
     plot_1D_density_only,
     plot_2D_density_only,
     plot_savefig,
@@ -24,9 +24,9 @@ from sys import argv
 if __name__ == "__main__":
     filelist = argv[1:]
 
-    for fname in filelist:
-        ndim, rho, u, p, t, step = read_output(fname)
-
+    for fname, (ndim, rho, u, p, t, step) in prefetch_outputs(
+        filelist, fields=("rho",)
+    ):
         if ndim == 1:
             kwargs = label_to_kwargs(t)
             fig = plot_1D_density_only(rho, draw_legend=True, kwargs=kwargs)
@@ -9,7 +9,7 @@
 #   plot_all_results_individually.py <file1> <file2> ... <file N>
 # ------------------------------------------------------------------------------------
 
-from mesh_hydro_utils import read_output, plot_1D, plot_2D, plot_savefig
+from mesh_hydro_utils import prefetch_outputs, plot_1D, plot_2D, plot_savefig
 
 from sys import argv
 
@@ -17,9 +17,7 @@ from sys import argv
 if __name__ == "__main__":
     filelist = argv[1:]
 
-    for fname in filelist:
-        ndim, rho, u, p, t, step = read_output(fname)
-
+    for fname, (ndim, rho, u, p, t, step) in prefetch_outputs(filelist):
         if ndim == 1:
             fig = plot_1D(rho, u, p)
         elif ndim == 2:
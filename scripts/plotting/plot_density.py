@@ -21,7 +21,7 @@ from mesh_hydro_utils import (
 
 if __name__ == "__main__":
     fname = get_only_cmdlinearg()
-    ndim, rho, u, p, t, step = read_output(fname)
+    ndim, rho, u, p, t, step = read_output(fname, fields=("rho",))
 
     if ndim == 1:
         fig = plot_1D_density_only(rho, draw_legend=True, kwargs=label_to_kwargs(t))
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+
+# ------------------------------------------------------------------------------------
+# Plot the results of a running simulation as soon as they are written.
+# Watches the given directory for new output files, and creates a plot for
+# every complete new output, like plot_all_results_individually.py. The
+# progress is kept in <directory>/.watch_results.json, so restarting the
+# script doesn't plot the same outputs again.
+#
+# Usage:
+#   watch_results.py <directory> [timeout]
+#
+#   timeout: stop once there were no new outputs for this many seconds.
+#            Runs until interrupted if not given.
+# ------------------------------------------------------------------------------------
+
+import os
+from sys import argv
+
+from mesh_hydro_utils import OutputWatcher, read_output, plot_1D, plot_2D, plot_savefig
+
+
+def plot_result(fname):
+    """
+    Plot the output fname.
+    """
+
+    ndim, rho, u, p, t, step = read_output(fname)
+    if ndim == 1:
+        fig = plot_1D(rho, u, p)
+    elif ndim == 2:
+        fig = plot_2D(rho, u, p, t=t)
+
+    plot_savefig(fig, fname)
+
+    return
+
+
+if __name__ == "__main__":
+    if len(argv) < 2 or len(argv) > 3:
+        print(argv)
+        raise ValueError("Usage: watch_results.py <directory> [timeout]")
+
+    directory = argv[1]
+    timeout = None
+    if len(argv) == 3:
+        timeout = float(argv[2])
+
+    watcher = OutputWatcher(
+        directory, progress=os.path.join(directory, ".watch_results.json")
+    )
+    watcher.register(plot_result)
+    watcher.run(timeout=timeout)
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+# ------------------------------------------------------------------------------------
+# Check that compressed outputs and ICs read the same as the uncompressed
+# original. Outputs (.out) are read with read_output, everything else with
+# read_ic.
+#
+# Usage:
+#   check_compressed.py <original> <compressed1> ... <compressedN>
+# ------------------------------------------------------------------------------------
+
+
+from mesh_hydro_utils import read_ic, read_output
+
+from sys import argv
+
+import numpy as np
+
+
+def read(fname, is_output):
+    """
+    Read an output or IC file. Returns a list of everything read_output or
+    read_ic return.
+    """
+
+    if is_output:
+        return list(read_output(fname))
+    else:
+        return list(read_ic(fname))
+
+
+if __name__ == "__main__":
+    if len(argv) < 3:
+        print(argv)
+        raise ValueError(
+            "Usage: check_compressed.py <original> <compressed1> ... <compressedN>"
+        )
+
+    original = argv[1]
+    is_output = original.endswith(".out")
+    expected = read(original, is_output)
+
+    for fname in argv[2:]:
+        got = read(fname, is_output)
+        for k, (a, b) in enumerate(zip(got, expected)):
+            if not np.array_equal(a, b):
+                raise ValueError(
+                    "{0}: return value {1} differs from {2}".format(fname, k, original)
+                )
+
+        print("{0}: matches {1}".format(fname, original))
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+
+# ------------------------------------------------------------------------------------
+# Check that an IC written as HDF5 file reads back the same as the text IC.
+# Reads the given text IC files, writes them again with write_ic as .hdf5
+# files, and compares what read_ic returns for both. The HDF5 files are
+# removed afterwards.
+#
+# Usage:
+#   check_ic_hdf5.py <file1> ... <fileN>
+# ------------------------------------------------------------------------------------
+
+
+from mesh_hydro_utils import read_ic, write_ic
+
+import os
+from sys import argv
+
+import numpy as np
+
+
+if __name__ == "__main__":
+    if len(argv) < 2:
+        print(argv)
+        raise ValueError("Usage: check_ic_hdf5.py <file1> ... <fileN>")
+
+    for fname in argv[1:]:
+        ndim, twostate, rho, u, p = read_ic(fname)
+
+        # read_ic returns 2D arrays indexed [j, i], write_ic takes [i, j]
+        if ndim == 2:
+            rho_ic, u_ic, p_ic = rho.T, u.transpose(1, 0, 2), p.T
+        else:
+            rho_ic, u_ic, p_ic = rho, u, p
+
+        hdf5name = os.path.splitext(fname)[0] + "-check.hdf5"
+        write_ic(hdf5name, ndim, rho_ic, u_ic, p_ic)
+        try:
+            ndim_h5, twostate_h5, rho_h5, u_h5, p_h5 = read_ic(hdf5name)
+        finally:
+            os.remove(hdf5name)
+
+        if ndim_h5 != ndim:
+            raise ValueError(
+                "{0}: got ndim {1} from the HDF5 file, expected {2}".format(
+                    fname, ndim_h5, ndim
+                )
+            )
+
+        for name, text, hdf5 in (("rho", rho, rho_h5), ("u", u, u_h5), ("p", p, p_h5)):
+            if hdf5.shape != text.shape or not np.array_equal(hdf5, text):
+                raise ValueError(
+                    "{0}: {1} read from the HDF5 file differs from the text IC".format(
+                        fname, name
+                    )
+                )
+
+        print("{0}: HDF5 IC matches".format(fname))
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+
+# ------------------------------------------------------------------------------------
+# Check that reading outputs block by block gives the same as reading them
+# at once: The blocks of read_output_blocks must add up to the full arrays,
+# and output_sum, output_minmax, and output_histogram must agree with numpy
+# on the full arrays. Small blocks are used so that every output is split
+# into several of them.
+#
+# Usage:
+#   check_output_blocks.py <file1> ... <fileN>
+# ------------------------------------------------------------------------------------
+
+
+from mesh_hydro_utils import read_output, read_output_blocks
+from mesh_hydro_utils import output_sum, output_minmax, output_histogram
+
+from sys import argv
+
+import numpy as np
+
+
+field_names = ["rho", "u", "p"]
+
+
+def check(condition, message):
+    """
+    Raise a ValueError with message if condition is False.
+    """
+
+    if not condition:
+        raise ValueError(message)
+
+    return
+
+
+def check_blocks(fname, full, max_bytes, fields, dtype):
+    """
+    Check that the blocks of fname add up to the full arrays.
+    """
+
+    what = "{0} max_bytes={1} fields={2} dtype={3}".format(
+        fname, max_bytes, fields, np.dtype(dtype).name
+    )
+    nx = full[1].shape[0]
+
+    blocks = {name: [] for name in field_names}
+    nblocks = 0
+    jnext = 0
+    for j0, j1, rho, u, p in read_output_blocks(fname, max_bytes, fields, dtype):
+        check(j0 == jnext and j1 > j0, "{0}: blocks aren't contiguous".format(what))
+        jnext = j1
+        nblocks += 1
+        for name, values in zip(field_names, (rho, u, p)):
+            if fields is not None and name not in fields:
+                check(values is None, "{0}: {1} should be None".format(what, name))
+            else:
+                check(
+                    values.shape[0] == j1 - j0 and values.dtype == dtype,
+                    "{0}: {1} has the wrong shape or dtype".format(what, name),
+                )
+                blocks[name].append(values)
+
+    check(jnext == nx, "{0}: blocks don't cover all cells".format(what))
+    check(nblocks > 1, "{0}: expected more than one block".format(what))
+
+    for name, values in zip(field_names, full[1:4]):
+        if fields is not None and name not in fields:
+            continue
+        check(
+            np.array_equal(np.concatenate(blocks[name]), values.astype(dtype)),
+            "{0}: {1} differs from the full read".format(what, name),
+        )
+
+    return
+
+
+def check_reductions(fname, full, max_bytes):
+    """
+    Compare output_sum, output_minmax, and output_histogram with numpy.
+    """
+
+    for name, values in zip(field_names, full[1:4]):
+        what = "{0} {1}".format(fname, name)
+        # sums and extrema per velocity component
+        axis = (0, 1) if values.ndim == 3 else None
+
+        total = output_sum(fname, name, max_bytes)
+        check(
+            np.allclose(total, np.sum(values, axis=axis), rtol=1e-12, atol=1e-12),
+            "{0}: output_sum differs from np.sum".format(what),
+        )
+
+        vmin, vmax = output_minmax(fname, name, max_bytes)
+        check(
+            np.array_equal(vmin, np.min(values, axis=axis))
+            and np.array_equal(vmax, np.max(values, axis=axis)),
+            "{0}: output_minmax differs from np.min and np.max".format(what),
+        )
+
+        components = [0, 1] if values.ndim == 3 else [0]
+        for component in components:
+            if values.ndim == 3:
+                cvalues = values[:, :, component]
+            else:
+                cvalues = values
+            vrange = (np.min(cvalues), np.max(cvalues))
+            edges = np.linspace(vrange[0] - 0.5, vrange[1] + 0.5, 7)
+
+            for kwargs, nkwargs in (
+                ({"bins": 10}, {"bins": 10}),
+                (
+                    {"bins": 5, "bins_range": (vrange[0], 0.5 * sum(vrange))},
+                    {"bins": 5, "range": (vrange[0], 0.5 * sum(vrange))},
+                ),
+                ({"bins": edges}, {"bins": edges}),
+            ):
+                hist, bin_edges = output_histogram(
+                    fname, name, component=component, max_bytes=max_bytes, **kwargs
+                )
+                nhist, nbin_edges = np.histogram(cvalues, **nkwargs)
+                check(
+                    np.array_equal(hist, nhist)
+                    and np.array_equal(bin_edges, nbin_edges),
+                    "{0}: output_histogram with {1} differs from np.histogram".format(
+                        what, kwargs
+                    ),
+                )
+
+    return
+
+
+if __name__ == "__main__":
+    if len(argv) < 2:
+        print(argv)
+        raise ValueError("Usage: check_output_blocks.py <file1> ... <fileN>")
+
+    for fname in argv[1:]:
+        full = read_output(fname)
+        ndim = full[0]
+        nx = full[1].shape[0]
+
+        # blocks of 4 double precision values take 32 bytes per cell, even
+        # without the text, so there are at least four blocks
+        max_bytes = nx**ndim * 8
+
+        for fields in (None, ("u",), ("rho", "p")):
+            for dtype in (float, np.float32):
+                check_blocks(fname, full, max_bytes, fields, dtype)
+        check_reductions(fname, full, max_bytes)
+
+        print("{0}: blocks and reductions match the full read".format(fname))
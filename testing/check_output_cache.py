@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+
+# ------------------------------------------------------------------------------------
+# Check the on-disk cache of decoded output files: Reads must return the
+# same as without the cache, repeated reads must come from the cache, entries
+# must be replaced when the output file changes, the least recently used
+# entries must be removed when the cache exceeds its maximal size, and
+# clear_output_cache must remove all entries. Works on copies of the given
+# outputs in a temporary directory, which also holds the cache.
+#
+# Usage:
+#   check_output_cache.py <file1> <file2> <file3>
+# ------------------------------------------------------------------------------------
+
+
+from mesh_hydro_utils import read_output
+from mesh_hydro_utils import (
+    enable_output_cache,
+    disable_output_cache,
+    clear_output_cache,
+)
+
+import os
+import shutil
+import tempfile
+import time
+from sys import argv
+
+import numpy as np
+
+
+def cache_entries(cachedir):
+    """
+    Get the sorted file names of all entries in the cache directory.
+    """
+
+    return sorted(e for e in os.listdir(cachedir) if e.endswith(".npy"))
+
+
+def is_memory_mapped(a):
+    """
+    Check whether the array a is a view into a memory-mapped file.
+    """
+
+    while a is not None:
+        if isinstance(a, np.memmap):
+            return True
+        a = a.base
+
+    return False
+
+
+def check_equal(what, got, expected, from_cache):
+    """
+    Check that the tuples returned by read_output are equal, that the
+    arrays are read-only, and whether they come from the cache. Raises a
+    ValueError otherwise.
+    """
+
+    for a, b in zip(got, expected):
+        if isinstance(b, np.ndarray):
+            if not np.array_equal(a, b):
+                raise ValueError("{0}: got different data".format(what))
+            if a.flags.writeable:
+                raise ValueError("{0}: arrays should be read-only".format(what))
+            if is_memory_mapped(a) != from_cache:
+                raise ValueError(
+                    "{0}: data should {1}come from the cache".format(
+                        what, "" if from_cache else "not "
+                    )
+                )
+        elif a != b:
+            raise ValueError("{0}: got different ndim, t, or step".format(what))
+
+    return
+
+
+def check_entries(what, cachedir, nentries):
+    """
+    Check the number of entries in the cache. Raises a ValueError otherwise.
+    """
+
+    entries = cache_entries(cachedir)
+    if len(entries) != nentries:
+        raise ValueError(
+            "{0}: expected {1} cache entries, got {2}".format(
+                what, nentries, len(entries)
+            )
+        )
+
+    return entries
+
+
+if __name__ == "__main__":
+    if len(argv) != 4:
+        print(argv)
+        raise ValueError("Usage: check_output_cache.py <file1> <file2> <file3>")
+
+    originals = argv[1:]
+    expected = [read_output(f) for f in originals]
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        cachedir = os.path.join(tmpdir, "cache")
+        files = []
+        for k, f in enumerate(originals):
+            files.append(os.path.join(tmpdir, "output-{0:04d}.out".format(k)))
+            shutil.copy(f, files[-1])
+
+        enable_output_cache(cachedir)
+
+        # misses decode the file and create an entry, hits map the entry
+        check_equal("miss", read_output(files[0]), expected[0], False)
+        check_entries("miss", cachedir, 1)
+        check_equal("hit", read_output(files[0]), expected[0], True)
+        check_entries("hit", cachedir, 1)
+
+        # regions of cached outputs come from the entry
+        ndim = expected[0][0]
+        region = (1, 5) if ndim == 1 else (1, 5, 2, 7)
+        slices = (slice(1, 5),) if ndim == 1 else (slice(2, 7), slice(1, 5))
+        sliced = [a[slices] if isinstance(a, np.ndarray) else a for a in expected[0]]
+        got = read_output(files[0], region=region)
+        check_equal("region hit", got, sliced, True)
+
+        # regions of outputs that aren't cached are read directly
+        clear_output_cache()
+        check_entries("clear", cachedir, 0)
+        got = read_output(files[0], region=region)
+        check_equal("region miss", got, sliced, False)
+        check_entries("region miss", cachedir, 0)
+
+        # float32 data are stored in their own entry
+        read_output(files[0])
+        got = read_output(files[0], dtype=np.float32)
+        expected32 = [
+            a.astype(np.float32) if isinstance(a, np.ndarray) else a
+            for a in expected[0]
+        ]
+        check_equal("float32 miss", got, expected32, False)
+        check_entries("float32 miss", cachedir, 2)
+        check_equal(
+            "float32 hit", read_output(files[0], dtype=np.float32), expected32, True
+        )
+        clear_output_cache()
+
+        # changing the output file replaces its entry
+        read_output(files[0])
+        old = check_entries("invalidation", cachedir, 1)
+        shutil.copy(originals[1], files[0])
+        # make sure the modification time changes
+        stat = os.stat(files[0])
+        os.utime(files[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+        check_equal("changed file", read_output(files[0]), expected[1], False)
+        new = check_entries("changed file", cachedir, 1)
+        if new == old:
+            raise ValueError("The entry of the changed file wasn't replaced")
+        check_equal("changed file hit", read_output(files[0]), expected[1], True)
+        shutil.copy(originals[0], files[0])
+        clear_output_cache()
+
+        # room for two entries: reading the third file evicts the least
+        # recently used one
+        read_output(files[0])
+        entrysize = os.path.getsize(os.path.join(cachedir, cache_entries(cachedir)[0]))
+        for f in files[1:]:
+            if os.path.getsize(f) != os.path.getsize(files[0]):
+                raise ValueError("The outputs need to have the same size")
+        enable_output_cache(cachedir, maxsize=int(2.5 * entrysize))
+        time.sleep(0.05)
+        read_output(files[1])
+        time.sleep(0.05)
+        # use the first entry again, so that the second one is the oldest
+        check_equal("LRU hit", read_output(files[0]), expected[0], True)
+        time.sleep(0.05)
+        read_output(files[2])
+        check_entries("LRU", cachedir, 2)
+        check_equal("LRU kept", read_output(files[0]), expected[0], True)
+        check_equal("LRU kept", read_output(files[2]), expected[2], True)
+        check_equal("LRU evicted", read_output(files[1]), expected[1], False)
+        clear_output_cache()
+
+        # entries larger than the cache aren't stored
+        enable_output_cache(cachedir, maxsize=entrysize // 2)
+        check_equal("too large", read_output(files[0]), expected[0], False)
+        check_entries("too large", cachedir, 0)
+
+        # without the cache, arrays are writeable again
+        disable_output_cache()
+        rho = read_output(files[0])[1]
+        if not rho.flags.writeable:
+            raise ValueError("Arrays should be writeable without the cache")
+        check_entries("disabled", cachedir, 0)
+
+    finally:
+        disable_output_cache()
+        shutil.rmtree(tmpdir)
+
+    print("output cache works as expected")
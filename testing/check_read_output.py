@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+# ------------------------------------------------------------------------------------
+# Check that read_output returns the same as slicing the arrays of a full
+# read when it reads only a region of the grid, only some of the fields,
+# or converts to float32 while reading.
+#
+# Usage:
+#   check_read_output.py <file1> ... <fileN>
+# ------------------------------------------------------------------------------------
+
+
+from mesh_hydro_utils import read_output
+
+from sys import argv
+
+import numpy as np
+
+
+field_names = ["rho", "u", "p"]
+fields_list = [None, ("rho",), ("u", "p"), ("p",)]
+dtypes = [float, np.float32]
+
+
+def get_regions(ndim, nx):
+    """
+    Get some regions to read from an output with nx cells per dimension,
+    including ones at the boundaries and the whole grid.
+    """
+
+    if ndim == 1:
+        return [(0, nx), (3, 17), (nx - 5, nx), (0, 1)]
+    else:
+        return [(0, nx, 0, nx), (2, 9, 5, 13), (nx - 4, nx, 0, 3), (0, 1, nx - 1, nx)]
+
+
+def get_slices(ndim, region):
+    """
+    Get the slices of the full arrays that correspond to region.
+    """
+
+    if ndim == 1:
+        return (slice(region[0], region[1]),)
+    else:
+        return (slice(region[2], region[3]), slice(region[0], region[1]))
+
+
+def check_region(fname, full, region, fields, dtype):
+    """
+    Compare reading region, fields, and dtype of fname with the arrays of
+    the full read. Raises a ValueError if they differ.
+    """
+
+    ndim, rho, u, p, t, step = read_output(
+        fname, region=region, fields=fields, dtype=dtype
+    )
+    got = [rho, u, p]
+    what = "{0} region={1} fields={2} dtype={3}".format(
+        fname, region, fields, np.dtype(dtype).name
+    )
+
+    if (ndim, t, step) != (full[0], full[4], full[5]):
+        raise ValueError("{0}: got a different ndim, t, or step".format(what))
+
+    slices = get_slices(ndim, region)
+    for name, a, b in zip(field_names, got, full[1:4]):
+        if fields is not None and name not in fields:
+            if a is not None:
+                raise ValueError("{0}: {1} should be None".format(what, name))
+            continue
+
+        expected = b[slices].astype(dtype)
+        if a.dtype != expected.dtype:
+            raise ValueError("{0}: {1} has dtype {2}".format(what, name, a.dtype.name))
+        if not np.array_equal(a, expected):
+            raise ValueError(
+                "{0}: {1} differs from the slice of the full read".format(what, name)
+            )
+
+    return
+
+
+if __name__ == "__main__":
+    if len(argv) < 2:
+        print(argv)
+        raise ValueError("Usage: check_read_output.py <file1> ... <fileN>")
+
+    for fname in argv[1:]:
+        full = read_output(fname)
+        ndim = full[0]
+        nx = full[1].shape[0]
+
+        for region in get_regions(ndim, nx):
+            for fields in fields_list:
+                for dtype in dtypes:
+                    check_region(fname, full, region, fields, dtype)
+
+        print("{0}: regions, fields, and dtypes match the full read".format(fname))
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+
+# ------------------------------------------------------------------------------------
+# Check RiemannSolver instances with a non-default adiabatic index and
+# geometry: The star states of the standard Riemann problems with
+# gamma = 1.4 must match the values given by Toro (Riemann Solvers and
+# Numerical Methods for Fluid Dynamics, table 4.3). A solver with a shifted
+# discontinuity x0 must give the same solution as the module-level
+# riemann_solver with the same parameters, and the same solution when the
+# whole box is translated. Finally, solvers must be immutable, and survive
+# pickling.
+#
+# Usage:
+#   check_riemann_solver.py
+# ------------------------------------------------------------------------------------
+
+
+from mesh_hydro_utils import RiemannSolver, riemann_solver
+
+from contextlib import redirect_stdout
+from io import StringIO
+import pickle
+
+import numpy as np
+
+
+# left and right density, velocity, pressure, and the star pressure and
+# velocity for gamma = 1.4
+toro_problems = [
+    (1.0, 0.0, 1.0, 0.125, 0.0, 0.1, 0.30313, 0.92745),
+    (1.0, -2.0, 0.4, 1.0, 2.0, 0.4, 0.00189, 0.0),
+    (1.0, 0.0, 1000.0, 1.0, 0.0, 0.01, 460.894, 19.5975),
+    (1.0, 0.0, 0.01, 1.0, 0.0, 100.0, 46.0950, -6.19633),
+    (5.99924, 19.5975, 460.894, 5.99242, -6.19633, 46.0950, 1691.64, 8.68975),
+]
+
+
+def check(condition, message):
+    """
+    Raise a ValueError with message if condition is False.
+    """
+
+    if not condition:
+        raise ValueError(message)
+
+    return
+
+
+def check_star_states():
+    """
+    Compare the star states with gamma = 1.4 with Toro's values.
+    """
+
+    solver = RiemannSolver(gamma=1.4)
+    states = np.array(toro_problems)
+    pstar, ustar, niter = solver.find_star_states(*states[:, :6].T)
+
+    # Toro gives 6 significant digits, but only 3 for the tiny star
+    # pressure of the second problem
+    check(
+        np.allclose(pstar, states[:, 6], rtol=5e-6, atol=5e-6),
+        "Star pressures {0} don't match Toro's".format(pstar),
+    )
+    check(
+        np.allclose(ustar, states[:, 7], rtol=5e-6, atol=5e-6),
+        "Star velocities {0} don't match Toro's".format(ustar),
+    )
+
+    return
+
+
+def solve_quietly(solver, *args, **kwargs):
+    """
+    Call solver with the given arguments without printing anything.
+    """
+
+    with redirect_stdout(StringIO()):
+        return solver(*args, **kwargs)
+
+
+def check_geometry():
+    """
+    Compare a solver with gamma = 1.4 and a shifted discontinuity with the
+    module-level riemann_solver, and with a translated box.
+    """
+
+    gamma = 1.4
+    xmin, xmax, x0 = -0.5, 1.5, 0.3
+    nx = 400
+    t = 0.1
+
+    x = xmin + (np.arange(nx) + 0.5) * (xmax - xmin) / nx
+    rho = np.where(x < x0, 1.0, 0.125)
+    u = np.zeros(nx)
+    p = np.where(x < x0, 1.0, 0.1)
+
+    solver = RiemannSolver(gamma, xmin=xmin, xmax=xmax, x0=x0)
+    solution = solve_quietly(solver.solve, rho, u, p, t)
+    expected = solve_quietly(
+        riemann_solver, rho, u, p, t, gamma=gamma, xmin=xmin, xmax=xmax, x0=x0
+    )
+    for name, a, b in zip(("rho", "u", "p"), solution, expected):
+        check(
+            np.array_equal(a, b),
+            "RiemannSolver.solve and riemann_solver give different {0}".format(name),
+        )
+
+    # the contact moves with the star velocity from x0: next to it, the
+    # pressure and velocity are the star values, and the density jumps
+    pstar, ustar, niter = solver.find_star_states(1.0, 0.0, 1.0, 0.125, 0.0, 0.1)
+    dx = (xmax - xmin) / nx
+    contact = x0 + float(ustar) * t
+    left = (x > contact - 3 * dx) & (x < contact - dx)
+    right = (x > contact + dx) & (x < contact + 3 * dx)
+    rho_sol, u_sol, p_sol = solution
+    check(
+        np.allclose(p_sol[left | right], pstar)
+        and np.allclose(u_sol[left | right], ustar)
+        and np.min(rho_sol[left]) > np.max(rho_sol[right]),
+        "Contact isn't at x0 + ustar * t = {0}".format(contact),
+    )
+
+    # translating the whole box doesn't change anything
+    shift = 2.25
+    translated = RiemannSolver(
+        gamma, xmin=xmin + shift, xmax=xmax + shift, x0=x0 + shift
+    )
+    for name, a, b in zip(
+        ("rho", "u", "p"), solve_quietly(translated.solve, rho, u, p, t), solution
+    ):
+        check(
+            np.allclose(a, b, rtol=1e-12, atol=1e-12),
+            "Translated box gives different {0}".format(name),
+        )
+
+    # and gamma is used
+    default = solve_quietly(
+        RiemannSolver(xmin=xmin, xmax=xmax, x0=x0).solve, rho, u, p, t
+    )
+    check(
+        not np.allclose(default[2], solution[2]),
+        "Solutions with different gamma are the same",
+    )
+
+    return
+
+
+def check_immutable():
+    """
+    Check that solvers can't be modified, and survive pickling.
+    """
+
+    solver = RiemannSolver(1.4, xmin=-0.5, xmax=1.5, x0=0.3)
+
+    for name, value in (("gamma", 2.0), ("GM1", 1.0), ("x0", 0.0), ("new", 1)):
+        try:
+            setattr(solver, name, value)
+        except AttributeError:
+            pass
+        else:
+            raise ValueError("Could set attribute {0} of RiemannSolver".format(name))
+
+    try:
+        del solver.gamma
+    except AttributeError:
+        pass
+    else:
+        raise ValueError("Could delete attribute gamma of RiemannSolver")
+
+    check(
+        (solver.gamma, solver.GM1, solver.x0) == (1.4, 1.4 - 1, 0.3),
+        "RiemannSolver attributes changed",
+    )
+
+    copy = pickle.loads(pickle.dumps(solver))
+    check(
+        copy == solver and hash(copy) == hash(solver),
+        "Pickled RiemannSolver differs",
+    )
+    check(copy.GM1OGP1 == solver.GM1OGP1, "Pickled RiemannSolver differs")
+
+    return
+
+
+if __name__ == "__main__":
+    check_star_states()
+    check_geometry()
+    check_immutable()
+
+    print("RiemannSolver works as expected")
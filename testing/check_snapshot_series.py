@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+
+# ------------------------------------------------------------------------------------
+# Check Snapshot and SnapshotSeries against read_output: A Snapshot must
+# give the same metadata and fields as read_output, and decode only the
+# fields that are accessed. A SnapshotSeries of the given outputs must
+# contain the same fields, times, and steps as reading the outputs one by
+# one, reuse its store as long as the outputs don't change, and rewrite it
+# otherwise. Works on copies of the given outputs in a temporary directory.
+#
+# Usage:
+#   check_snapshot_series.py <file1> ... <fileN>
+# ------------------------------------------------------------------------------------
+
+
+from mesh_hydro_utils import read_output, Snapshot, SnapshotSeries
+
+import os
+import shutil
+import tempfile
+from sys import argv
+
+import numpy as np
+
+
+def check(condition, message):
+    """
+    Raise a ValueError with message if condition is False.
+    """
+
+    if not condition:
+        raise ValueError(message)
+
+    return
+
+
+def check_snapshot(fname):
+    """
+    Compare a Snapshot of fname with read_output.
+    """
+
+    ndim, rho, u, p, t, step = read_output(fname)
+
+    snap = Snapshot(fname)
+    check(
+        (snap.ndim, snap.nx, snap.t, snap.step) == (ndim, rho.shape[0], t, step),
+        "Snapshot of {0} has wrong metadata".format(fname),
+    )
+
+    # only the accessed fields are decoded
+    check(np.array_equal(snap.p, p), "Snapshot of {0} has wrong p".format(fname))
+    check(
+        snap._rho is None and snap._u is None,
+        "Snapshot of {0} decoded fields that weren't accessed".format(fname),
+    )
+    check(np.array_equal(snap.rho, rho), "Snapshot of {0} has wrong rho".format(fname))
+    check(np.array_equal(snap.u, u), "Snapshot of {0} has wrong u".format(fname))
+
+    snap.unload()
+    check(
+        snap._rho is None and snap._u is None and snap._p is None,
+        "Snapshot of {0} kept fields after unload".format(fname),
+    )
+    snap.load()
+    check(
+        np.array_equal(snap._rho, rho),
+        "Snapshot of {0} has wrong rho after load".format(fname),
+    )
+
+    # regions and dtypes are passed on to read_output
+    region = (1, 4) if ndim == 1 else (1, 4, 2, 6)
+    slices = (slice(1, 4),) if ndim == 1 else (slice(2, 6), slice(1, 4))
+    snap = Snapshot(fname, region=region, dtype=np.float32)
+    check(
+        snap.u.dtype == np.float32
+        and np.array_equal(snap.u, u[slices].astype(np.float32)),
+        "Snapshot of a region of {0} has wrong u".format(fname),
+    )
+
+    return
+
+
+def check_series(series, filelist, dtype=float):
+    """
+    Compare the contents of a SnapshotSeries with reading the files in
+    filelist one by one.
+    """
+
+    check(len(series) == len(filelist), "Series has the wrong length")
+
+    for k, fname in enumerate(filelist):
+        ndim, rho, u, p, t, step = read_output(fname, dtype=dtype)
+        check(
+            (series.ndim, series.nx) == (ndim, rho.shape[0]),
+            "Series has wrong ndim or nx",
+        )
+        srho, su, sp, st, sstep = series[k]
+        for name, a, b in (("rho", srho, rho), ("u", su, u), ("p", sp, p)):
+            check(
+                a.dtype == b.dtype and np.array_equal(a, b),
+                "Series has wrong {0} for {1}".format(name, fname),
+            )
+        check(
+            (st, sstep) == (t, step),
+            "Series has wrong time or step for {0}".format(fname),
+        )
+        check(series.nearest(t) == k, "Series finds the wrong output for t")
+
+    check(
+        series.time_slice(series.times[1], series.times[-1]) == slice(1, len(series)),
+        "Series gives the wrong time slice",
+    )
+    rho = series[1:][0]
+    check(rho.shape[0] == len(series) - 1, "Series gives the wrong slice")
+
+    return
+
+
+if __name__ == "__main__":
+    if len(argv) < 3:
+        print(argv)
+        raise ValueError("Usage: check_snapshot_series.py <file1> ... <fileN>")
+
+    for fname in argv[1:]:
+        check_snapshot(fname)
+    print("Snapshots match read_output")
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        filelist = []
+        for fname in argv[1:]:
+            filelist.append(os.path.join(tmpdir, os.path.basename(fname)))
+            shutil.copy(fname, filelist[-1])
+
+        # the default store is next to the outputs
+        series = SnapshotSeries(filelist)
+        check(
+            os.path.dirname(series.store) == tmpdir
+            and series.store.endswith("-series"),
+            "Series has the wrong default store {0}".format(series.store),
+        )
+        check_series(series, filelist)
+
+        # the store is reused while the outputs don't change
+        rhofile = os.path.join(series.store, "rho.npy")
+        mtime = os.stat(rhofile).st_mtime_ns
+        series = SnapshotSeries(filelist)
+        check(os.stat(rhofile).st_mtime_ns == mtime, "Series store was rewritten")
+        check_series(series, filelist)
+
+        # and rewritten when one of them changes
+        stat = os.stat(filelist[1])
+        os.utime(filelist[1], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+        series = SnapshotSeries(filelist)
+        check(os.stat(rhofile).st_mtime_ns != mtime, "Series store wasn't rewritten")
+        check_series(series, filelist)
+
+        # or when a different dtype is requested
+        series = SnapshotSeries(filelist, dtype=np.float32)
+        check(series.rho.dtype == np.float32, "Series store has the wrong dtype")
+        check_series(series, filelist, dtype=np.float32)
+
+    finally:
+        shutil.rmtree(tmpdir)
+
+    print("SnapshotSeries matches read_output")
@@ -19,6 +19,12 @@ test_misc=true
 # test plotting scripts?
 test_plot=true
 
+# test reading compressed files?
+test_compression=true
+
+# test library functions directly?
+test_lib=true
+
 # clean up after yourself? I.e. remove all generated files?
 cleanup=true
 
@@ -105,6 +111,9 @@ if [[ "$test_ICs" == "true" ]]; then
     python3 $SCRIPTDIR/IC/uniform-2D.py
     diff ./uniform-2D-100.dat ./uniform-2D-100-reference.dat
 
+    echo "--- running ./check_ic_hdf5.py"
+    python3 ./check_ic_hdf5.py advection-1D-step-256.dat kelvin-helmholtz-256.dat
+
     if [[ "$cleanup" == "true" ]]; then
         echo "Cleaning up."
 
@@ -138,10 +147,30 @@ if [[ "$test_misc" == "true" ]]; then
     python3 $SCRIPTDIR/misc/convert_to_hdf5.py advection-2D-0004.out
     check_file_written ./advection-2D-0004.hdf5
 
+    echo "--- running $SCRIPTDIR/misc/convert_to_hdf5.py --run"
+    python3 $SCRIPTDIR/misc/convert_to_hdf5.py --run advection-2D.hdf5 --workers 2 advection-2D-000[0-2].out
+    python3 $SCRIPTDIR/misc/convert_to_hdf5.py --run advection-2D.hdf5 --append advection-2D-000*.out
+    check_file_written ./advection-2D.hdf5
+    # a single converted output isn't a run to append to
+    if python3 $SCRIPTDIR/misc/convert_to_hdf5.py --run advection-2D-0004.hdf5 --append advection-2D-0003.out 2> /dev/null; then
+        echo "Appending to advection-2D-0004.hdf5 should have failed"
+        exit 1
+    fi
+
+    echo "--- running $SCRIPTDIR/misc/compute_godunov_fluxes.py"
+    python3 $SCRIPTDIR/misc/compute_godunov_fluxes.py sod-shock-0001.out > godunov-fluxes-sod.dat
+    diff ./godunov-fluxes-sod.dat ./godunov-fluxes-sod-reference.dat
+    python3 $SCRIPTDIR/misc/compute_godunov_fluxes.py advection-2D-0004.out > godunov-fluxes-2D.dat
+    diff ./godunov-fluxes-2D.dat ./godunov-fluxes-2D-reference.dat
+
+    echo "--- running $SCRIPTDIR/benchmarks/benchmark_riemann_solvers.py 1000"
+    python3 $SCRIPTDIR/benchmarks/benchmark_riemann_solvers.py 1000
+
 
     if [[ "$cleanup" == "true" ]]; then
         echo "Cleaning up."
-        rm  -f advection-2D-0004.hdf5
+        rm  -f advection-2D-0004.hdf5 advection-2D.hdf5
+        rm  -f godunov-fluxes-sod.dat godunov-fluxes-2D.dat
     fi
 
 else
@@ -150,6 +179,81 @@ fi
 
 
 
+# ======================================
+# Compressed file tests
+# ======================================
+
+if [[ "$test_compression" == "true" ]]; then
+
+    echo "Running compressed file tests."
+
+    for f in advection-2D-0004.out sod-shock-0001.out ic-2D.dat ic-twostate.dat; do
+        gzip -k -f $f
+        bzip2 -k -f $f
+        xz -k -f $f
+        echo "--- running ./check_compressed.py $f"
+        python3 ./check_compressed.py $f $f.gz $f.bz2 $f.xz
+    done
+
+    echo "--- running $SCRIPTDIR/plotting/plot_result.py advection-2D-0004.out.gz"
+    $SCRIPTDIR/plotting/plot_result.py advection-2D-0004.out.gz
+    check_file_written advection-2D-0004.png
+
+    if [[ "$cleanup" == "true" ]]; then
+        echo "Cleaning up."
+        rm -f advection-2D-0004.png
+        for f in advection-2D-0004.out sod-shock-0001.out ic-2D.dat ic-twostate.dat; do
+            rm -f $f.gz $f.bz2 $f.xz
+        done
+    fi
+
+else
+    echo "Skipping compressed file tests."
+fi
+
+
+
+# ======================================
+# Library tests
+# ======================================
+
+if [[ "$test_lib" == "true" ]]; then
+
+    echo "Running library tests."
+
+    python3 $SCRIPTDIR/misc/convert_to_hdf5.py --precision double advection-2D-0004.out sod-shock-0001.out
+    check_file_written ./advection-2D-0004.hdf5
+    check_file_written ./sod-shock-0001.hdf5
+
+    echo "--- running ./check_read_output.py"
+    python3 ./check_read_output.py advection-2D-0004.out sod-shock-0001.out \
+        advection-2D-0004.hdf5 sod-shock-0001.hdf5
+
+    echo "--- running ./check_output_cache.py"
+    python3 ./check_output_cache.py advection-2D-0000.out advection-2D-0001.out advection-2D-0002.out
+
+    echo "--- running ./check_snapshot_series.py"
+    python3 ./check_snapshot_series.py advection-2D-000*.out
+    python3 ./check_snapshot_series.py sod-shock-000*.out
+
+    echo "--- running ./check_output_blocks.py"
+    python3 ./check_output_blocks.py advection-2D-0004.out sod-shock-0001.out \
+        advection-2D-0004.hdf5 sod-shock-0001.hdf5
+
+    echo "--- running ./check_riemann_solver.py"
+    python3 ./check_riemann_solver.py
+
+    if [[ "$cleanup" == "true" ]]; then
+        echo "Cleaning up."
+        rm -f advection-2D-0004.hdf5 sod-shock-0001.hdf5
+    fi
+
+else
+    echo "Skipping library tests."
+fi
+
+
+
 
 # ======================================
 # Plotting tests
@@ -266,6 +370,18 @@ if [[ "$test_plot" == "true" ]]; then
         check_png_deleted
     fi
 
+    echo "--- running $SCRIPTDIR/plotting/watch_results.py"
+    mkdir -p watch-test
+    cp advection-2D-0000.out advection-2D-0001.out watch-test
+    $SCRIPTDIR/plotting/watch_results.py watch-test 0
+    check_file_written watch-test/advection-2D-0000.png
+    check_file_written watch-test/advection-2D-0001.png
+    rm -f watch-test/advection-2D-0000.png watch-test/advection-2D-0001.png
+    # progress was kept: nothing to do the second time
+    $SCRIPTDIR/plotting/watch_results.py watch-test 0
+    check_png_deleted
+    rm -rf watch-test
+
     echo "--- running $SCRIPTDIR/plotting/plot_all_results_individually.py advection-2D-00*out"
     $SCRIPTDIR/plotting/plot_all_results_individually.py advection-2D-00*out
     check_file_written advection-2D-0000.png